@@ -1,30 +1,178 @@
+import argparse
+import inspect
+import json
+import math
+import platform
+import statistics
+import sys
 import time
-import random
-
-from mazes.generators import *
-from mazes.solvers import *
-
-random.seed(12345)
-
-for generator_class in [HuntAndKillGenerator, DepthFirstGenerator]:
-    print("starting", generator_class.__name__)
-    start = time.time()
-    maze_gen = generator_class(1000, 1000)
-    maze_gen.generate()
-    print("  generation took", time.time() - start)
-
-
-maze = DepthFirstGenerator(600, 600).generate()
-
-for solver_class in [BreadthFirstSolver, DepthFirstSolver]:
-    print("solving using", solver_class.__name__)
-    solver = solver_class()
-    start = time.time()
-    solution, iterations = solver.solve(maze)
-    print("  solution found, length:", len(solution), "iterations:", iterations)
-    print("  solving took", time.time()-start)
-    start = time.time()
-    for iterations, solution in enumerate(solver.solve_generator(maze)):
-        pass
-    print("  solution found, length:", len(solution), "iterations:", iterations)
-    print("  solving using generator took", time.time()-start)
+import tracemalloc
+from typing import Callable, Dict, List, Iterator, Tuple, Any, Type
+
+from mazes.generators import MazeGenerator, DepthFirstGenerator
+from mazes.maze import Maze
+from mazes.solvers import MazeSolver
+import mazes.tiled  # noqa: F401  (so the TiledGenerator is benchmarked as well)
+
+# Benchmarks every generator and solver over a range of maze sizes.
+# Every benchmark is run a few times after some warmup runs, and its min/median/95th percentile time is reported.
+# For the solvers, the number of iterations (cells expanded) is reported as well.
+# The peak memory use is measured in a separate run, because tracemalloc slows everything down a lot.
+# Results can be written to a JSON file, and compared against such a file from an earlier run (the baseline):
+# benchmarks whose median time got worse by more than the threshold are flagged as regressions.
+#
+#   python benchmark.py --sizes 100 1000 --output baseline.json
+#   (make changes)
+#   python benchmark.py --sizes 100 1000 --baseline baseline.json
+
+
+def concrete_subclasses(cls: type) -> List[type]:
+    classes = []
+    for subclass in cls.__subclasses__():
+        if not inspect.isabstract(subclass):
+            classes.append(subclass)
+        classes.extend(concrete_subclasses(subclass))
+    return sorted(set(classes), key=lambda c: c.__name__)
+
+
+def benchmarks(args: argparse.Namespace) -> Iterator[Tuple[str, Callable[[], Any]]]:
+    # (name, function to time) for every benchmark that was selected
+    generators = [c for c in concrete_subclasses(MazeGenerator) if selected(c, args.only)]
+    solvers = [c for c in concrete_subclasses(MazeSolver) if selected(c, args.only)]
+    for size in args.sizes:
+        for generator_class in generators:
+            yield "generate/{}/{}".format(generator_class.__name__, size), generate(generator_class, size, args.seed)
+        if solvers:
+            maze = DepthFirstGenerator(size, size, seed=args.seed).generate()
+            weighted_generator = DepthFirstGenerator(size, size, seed=args.seed)
+            weighted_maze = weighted_generator.generate()
+            weighted_generator.generate_costs()
+            # generate_costs is timed on a maze of its own, so it doesn't change the costs of the weighted maze
+            costs_generator = DepthFirstGenerator(size, size, seed=args.seed)
+            costs_generator.generate()
+            # braided mazes have loops, so the searches can't rule out as many cells
+            braided_generator = DepthFirstGenerator(size, size, seed=args.seed)
+            braided_maze = braided_generator.generate()
+            braided_generator.braid(args.braid)
+            yield "generate_costs/{}".format(size), costs_generator.generate_costs
+            for solver_class in solvers:
+                name = solver_class.__name__
+                yield "solve/{}/{}".format(name, size), solve(solver_class, maze)
+                yield "solve_braided/{}/{}".format(name, size), solve(solver_class, braided_maze)
+                if solver_class.weighted:
+                    yield "solve_weighted/{}/{}".format(name, size), solve(solver_class, weighted_maze)
+                if args.solve_generator:
+                    yield "solve_generator/{}/{}".format(name, size), solve_iterative(solver_class, maze)
+
+
+def selected(cls: type, only: List[str]) -> bool:
+    return not only or any(name.lower() in cls.__name__.lower() for name in only)
+
+
+def generate(generator_class: Type[MazeGenerator], size: int, seed: int) -> Callable[[], Any]:
+    return lambda: generator_class(size, size, seed=seed).generate()
+
+
+def solve(solver_class: Type[MazeSolver], maze: Maze) -> Callable[[], Any]:
+    return lambda: solver_class().solve(maze)
+
+
+def solve_iterative(solver_class: Type[MazeSolver], maze: Maze) -> Callable[[], Any]:
+    def run() -> None:
+        for _ in solver_class().solve_generator(maze):
+            pass
+    return run
+
+
+def measure(function: Callable[[], Any], warmup: int, repeat: int, memory: bool) -> Dict[str, float]:
+    for _ in range(warmup):
+        function()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outcome = function()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    result = {
+        "min": times[0],
+        "median": statistics.median(times),
+        "p95": times[math.ceil(0.95 * len(times)) - 1],
+        "repeat": repeat,
+    }
+    if isinstance(outcome, tuple):
+        # a solver's (path, iterations): the number of cells it expanded
+        result["iterations"] = outcome[1]
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    # the names of the benchmarks whose median time regressed by more than the threshold (a fraction)
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["median"] / baseline[name]["median"]
+        marker = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            marker = "  REGRESSION"
+        print("  {:50s} {:9.4f}s -> {:9.4f}s  {:+6.1f}%{}".format(
+            name, baseline[name]["median"], result["median"], (ratio - 1) * 100, marker))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="benchmark the maze generators and solvers")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 1000],
+                        help="maze sizes (columns and rows) to benchmark")
+    parser.add_argument("--only", nargs="*", default=[],
+                        help="only benchmark the generators and solvers whose name contains one of these")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed runs")
+    parser.add_argument("--warmup", type=int, default=1, help="number of untimed runs first")
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--braid", type=float, default=0.5,
+                        help="fraction of the dead ends to remove from the mazes for the braided maze benchmarks")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="don't measure peak memory use")
+    parser.add_argument("--solve-generator", action="store_true", help="also benchmark the solvers' solve_generator")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare the results with this JSON file from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="median time increase (fraction) above which a benchmark counts as a regression")
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("repeat must be at least 1")
+
+    results = {}
+    print("{:50s} {:>9s} {:>9s} {:>9s} {:>10s} {:>10s}".format("benchmark", "min", "median", "p95", "peak mem",
+                                                              "iterations"))
+    for name, function in benchmarks(args):
+        result = measure(function, args.warmup, args.repeat, args.memory)
+        results[name] = result
+        memory = "{:8.1f}Mb".format(result["peak_memory"] / 1e6) if "peak_memory" in result else ""
+        print("{:50s} {:8.4f}s {:8.4f}s {:8.4f}s {:>10s} {:>10s}".format(name, result["min"], result["median"],
+                                                                         result["p95"], memory,
+                                                                         str(result.get("iterations", ""))))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"python": sys.version, "platform": platform.platform(), "results": results}, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        print("compared to", args.baseline)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(len(regressions), "benchmark(s) regressed more than {:.0%}".format(args.threshold))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
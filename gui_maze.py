@@ -1,9 +1,11 @@
 import colorsys
 import tkinter
-from typing import Set, Tuple
+from typing import Dict, Tuple, Optional, List, Iterable, Callable, Sequence
 
 from mazes.generators import *
-from mazes.maze import Maze, dxdy
+from mazes.distances import distance_field
+from mazes.maze import Maze, dxdy, N, E
+from mazes.replay import ReplayPlayer, record_generation, record_solve
 from mazes.solvers import DepthFirstSolver, BreadthFirstSolver
 
 maze_sizes = {
@@ -12,6 +14,21 @@ maze_sizes = {
 }
 
 
+def rainbow_colors() -> List[str]:
+    # create a rainbow color table
+    colors = []
+    for hue in range(256):
+        rf, gf, bf = colorsys.hsv_to_rgb(hue / 256, 1, 0.99999)
+        r = int(rf * 256)
+        g = int(gf * 256)
+        b = int(bf * 256)
+        colors.append(f"#{r:02x}{g:02x}{b:02x}")
+    return colors
+
+
+tag_colors = rainbow_colors()
+
+
 class GuiWindow(tkinter.Tk):
     def __init__(self, columns: int, rows: int, scale: int) -> None:
         super().__init__()
@@ -35,67 +52,123 @@ class GuiWindow(tkinter.Tk):
         b2.pack(side=tkinter.LEFT)
         bf.pack(anchor=tkinter.W)
         self.canvas.pack(fill=tkinter.BOTH, expand=True, padx=4, pady=4)
-        self.drawn_tagged_cells: Set[Tuple[int, int]] = set()
+        # the generation and the searches are recorded first, and then played back as a replay
+        # that can be paused, sped up and slowed down, and scrubbed back and forth
+        pf = tkinter.Frame(self)
+        self.playing = True
+        self.play_button = tkinter.Button(pf, text="Pause", width=6, command=self.toggle_playing)
+        self.position = tkinter.Scale(pf, orient=tkinter.HORIZONTAL, showvalue=False, length=500, command=self.scrub)
+        self.speed = tkinter.Scale(pf, orient=tkinter.HORIZONTAL, from_=1, to=5000, label="steps per frame")
+        self.play_button.pack(side=tkinter.LEFT)
+        self.position.pack(side=tkinter.LEFT, fill=tkinter.X, expand=True)
+        self.speed.pack(side=tkinter.LEFT)
+        pf.pack(fill=tkinter.X)
+        self.player: Optional[ReplayPlayer] = None
+        self.show_frame: Callable[[List[int]], None] = lambda changed: None
+        self.finished: Optional[Callable[[], None]] = None
+        # what is currently drawn on the canvas, so that frames only have to update the cells that changed:
+        self.wall_items: Dict[Tuple[int, int], int] = {}   # (cell index, N or E) -> canvas line
+        self.visit_items: Dict[int, int] = {}   # cell index -> canvas rectangle
+        self.path_cells: List[int] = []     # the cells of the search path that's drawn, in order from the start
+        self.path_items: List[int] = []     # and their canvas rectangles
+        self.after(10, self.play_frame)
 
     def draw_maze(self, maze: Maze) -> None:
-        self.clear()  # don't redraw everything every frame but just keep removing walls progressively?
-        for y, row in enumerate(maze.cells):
-            for x, cell in enumerate(row):
+        # Draws the whole maze. After that, the frames of a replay only update the walls
+        # of the cells that the replay changed, with draw_walls().
+        self.clear()
+        for y in range(maze.num_rows):
+            offset = y * maze.num_columns
+            for x, cell in enumerate(maze.grid[offset:offset + maze.num_columns]):
                 # note that the south and west don't have to be drawn,
                 # because the neighbor cells already takes care of these
-                if 'n' not in cell.doors:
-                    self.line(x, y, x + 1, y)
-                if 'e' not in cell.doors:
-                    self.line(x + 1, y, x + 1, y + 1)
+                if not cell & N:
+                    self.wall_items[(offset + x, N)] = self.line(x, y, x + 1, y)
+                if not cell & E:
+                    self.wall_items[(offset + x, E)] = self.line(x + 1, y, x + 1, y + 1)
         # make sure the maze's west and south borders are closed:
         self.line(0, 0, 0, maze.num_rows)
         self.line(0, maze.num_rows, maze.num_columns, maze.num_rows)
 
-    def line(self, x1: int, y1: int, x2: int, y2: int) -> None:
-        self.canvas.create_line(1 + x1 * self.scale, 1 + y1 * self.scale, 1 + x2 * self.scale, 1 + y2 * self.scale)
+    def draw_walls(self, maze: Maze, cells: Iterable[int]) -> None:
+        # Updates just the N and E walls of the given cells: removes the walls of doors that are open,
+        # and puts back the walls of doors that are closed again (when a replay goes backwards).
+        # A carved door changes both cells it connects, so this also covers their S and W walls.
+        for index in cells:
+            y, x = divmod(index, maze.num_columns)
+            for door in (N, E):
+                if maze.grid[index] & door:
+                    if (index, door) in self.wall_items:
+                        self.canvas.delete(self.wall_items.pop((index, door)))
+                elif (index, door) not in self.wall_items:
+                    if door == N:
+                        self.wall_items[(index, N)] = self.line(x, y, x + 1, y)
+                    else:
+                        self.wall_items[(index, E)] = self.line(x + 1, y, x + 1, y + 1)
+
+    def line(self, x1: int, y1: int, x2: int, y2: int) -> int:
+        return self.canvas.create_line(1 + x1 * self.scale, 1 + y1 * self.scale,
+                                       1 + x2 * self.scale, 1 + y2 * self.scale)
 
     def clear(self) -> None:
         self.canvas.delete(tkinter.ALL)
-        self.drawn_tagged_cells.clear()
+        self.wall_items.clear()
+        self.visit_items.clear()
+        self.path_cells.clear()
+        self.path_items.clear()
 
-    def erase_path(self, path: str) -> None:
-        self.canvas.delete("path")
+    def erase_path(self, tag: str = "path") -> None:
+        self.canvas.delete(tag)
 
-    def draw_path(self, path: str, color: str = "navy") -> None:
+    def draw_path(self, path: str, color: str = "navy", tag: str = "path") -> None:
         x, y = 0, 0
-        pad = {"normal": 4, "large": 3}[self.sizevar.get()]
-        self.canvas.create_rectangle(x * self.scale + pad, y * self.scale + pad,
-                                     (x + 1) * self.scale - pad + 3, (y + 1) * self.scale - pad + 3,
-                                     fill=color, outline="", tags="path")
+        self.path_rectangle(x, y, color, tag)
         for step in path:
             x += dxdy[step][0]
             y += dxdy[step][1]
-            self.canvas.create_rectangle(x * self.scale + pad, y * self.scale + pad,
-                                         (x + 1) * self.scale - pad + 3, (y + 1) * self.scale - pad + 3,
-                                         fill=color, outline="", tags="path")
-
-    def draw_tagged_cells(self, maze: Maze) -> None:
-        # create a rainbow color table
-        colors = []
-        for hue in range(256):
-            rf, gf, bf = colorsys.hsv_to_rgb(hue / 256, 1, 0.99999)
-            r = int(rf * 256)
-            g = int(gf * 256)
-            b = int(bf * 256)
-            colors.append(f"#{r:02x}{g:02x}{b:02x}")
-
-        def color(tag: int) -> str:
-            return colors[tag % len(colors)]
+            self.path_rectangle(x, y, color, tag)
 
-        pad = {"normal": 3, "large": 2}[self.sizevar.get()]
+    def path_rectangle(self, x: int, y: int, color: str = "navy", tag: str = "path") -> int:
+        pad = {"normal": 4, "large": 3}[self.sizevar.get()]
+        return self.canvas.create_rectangle(x * self.scale + pad, y * self.scale + pad,
+                                            (x + 1) * self.scale - pad + 3, (y + 1) * self.scale - pad + 3,
+                                            fill=color, outline="", tags=tag)
 
-        for y, row in enumerate(maze.cells):
-            for x, cell in enumerate(row):
-                if cell.tag is not None and (x, y) not in self.drawn_tagged_cells:
-                    self.drawn_tagged_cells.add((x, y))
-                    self.canvas.create_rectangle(x * self.scale + pad, y * self.scale + pad,
-                                                 (x + 1) * self.scale - pad + 2, (y + 1) * self.scale - pad + 2,
-                                                 fill=color(cell.tag), outline="", tags="path")
+    def draw_search_path(self, maze: Maze, player: ReplayPlayer) -> None:
+        # Updates the drawn path to the path of the solver to its current cell. Only the cells that differ are
+        # redrawn: it walks back from the current cell until it joins the drawn path (a cell at the same distance
+        # from the start), removes the rest of the drawn path after that cell, and draws the new cells up to here.
+        distances = player.distances
+        cells = self.path_cells
+        new_cells = []
+        index = player.current
+        while index >= 0 and not (distances[index] < len(cells) and cells[distances[index]] == index):
+            new_cells.append(index)
+            index = player.came_from(index)
+        keep = distances[index] + 1 if index >= 0 else 0
+        for item in self.path_items[keep:]:
+            self.canvas.delete(item)
+        del cells[keep:]
+        del self.path_items[keep:]
+        for index in reversed(new_cells):
+            y, x = divmod(index, maze.num_columns)
+            cells.append(index)
+            self.path_items.append(self.path_rectangle(x, y))
+
+    def draw_visits(self, maze: Maze, distances: Sequence[int], visited: Sequence[int], cells: Iterable[int]) -> None:
+        # Colors the given cells by their distance in the distance field, if the solver visited them
+        # (visited is the distances array of the replay player, -1 for the cells that weren't visited),
+        # and removes the color of the ones it didn't visit (anymore).
+        pad = {"normal": 3, "large": 2}[self.sizevar.get()]
+        for index in cells:
+            if index in self.visit_items:
+                self.canvas.delete(self.visit_items.pop(index))
+            if visited[index] >= 0:
+                y, x = divmod(index, maze.num_columns)
+                self.visit_items[index] = self.canvas.create_rectangle(
+                    x * self.scale + pad, y * self.scale + pad,
+                    (x + 1) * self.scale - pad + 2, (y + 1) * self.scale - pad + 2,
+                    fill=tag_colors[distances[index] % len(tag_colors)], outline="", tags="visits")
 
     def resize_maze(self, size: str) -> None:
         self.columns, self.rows, self.scale = maze_sizes[size]
@@ -104,79 +177,82 @@ class GuiWindow(tkinter.Tk):
     def search_bfs(self):
         self.clear()
         self.resize_maze(self.sizevar.get())
-        fast_forward = {"normal": 2, "large": 20}[self.sizevar.get()]
 
         def solve_maze(maze: Maze) -> None:
-            solutions = BreadthFirstSolver().solve_generator(maze)
-            previous_path = ""
-
-            def animate_solve_tags():
-                nonlocal previous_path
-                more = True
-                try:
-                    for _ in range(fast_forward):
-                        previous_path = next(solutions)
-                except StopIteration:
-                    more = False
-                self.draw_tagged_cells(maze)
-                if more:
-                    self.after(1, animate_solve_tags)
-                else:
-                    self.draw_path(previous_path, "black")  # previous_path contains the shortest path
-
-            animate_solve_tags()
+            # The breadth-first search floods the maze from the start until it reaches the goal,
+            # the visited cells are colored by their distance from the start.
+            replay = record_solve(BreadthFirstSolver(), maze)
+            player = ReplayPlayer(replay, maze)
+            distances = distance_field(maze, [(0, 0)])
+
+            def show(changed: List[int]) -> None:
+                self.draw_visits(maze, distances, player.distances, changed)
+                self.erase_path("solution")
+                if player.frame == len(replay):
+                    self.draw_path(replay.solution, "black", "solution")
+
+            self.play(player, show, {"normal": 2, "large": 20}[self.sizevar.get()])
 
         self.generate_maze(solve_maze)
 
     def search_dfs(self):
         self.clear()
         self.resize_maze(self.sizevar.get())
-        fast_forward = {"normal": 10, "large": 100}[self.sizevar.get()]
 
         def solve_maze(maze: Maze) -> None:
-            solutions = DepthFirstSolver().solve_generator(maze)
-            previous_path = ""
-
-            def animate_solve_paths():
-                nonlocal previous_path
-                more = True
-                path = ""
-                try:
-                    for _ in range(fast_forward):
-                        path = next(solutions)
-                except StopIteration:
-                    more = False
-                if path:
-                    self.erase_path(previous_path)
-                    self.draw_path(path)
-                    previous_path = path
-                if more:
-                    gui.after(2, animate_solve_paths)
-
-            animate_solve_paths()
+            # shows the path the depth-first search is currently following
+            player = ReplayPlayer(record_solve(DepthFirstSolver(), maze), maze)
+
+            def show(changed: List[int]) -> None:
+                self.draw_search_path(maze, player)
+
+            self.play(player, show, {"normal": 10, "large": 100}[self.sizevar.get()])
 
         self.generate_maze(solve_maze)
 
-    def generate_maze(self, solver) -> None:
+    def generate_maze(self, solver: Callable[[Maze], None]) -> None:
         # maze_generator = HuntAndKillGenerator(self.columns, self.rows)
+        # maze_generator = KruskalGenerator(self.columns, self.rows)
         maze_generator = DepthFirstGenerator(self.columns, self.rows)
-        mazes = maze_generator.generate_iterative()
-        maze = Maze([[]])
+        player = ReplayPlayer(record_generation(maze_generator))
         fast_forward = {"normal": 5, "large": 250}[self.sizevar.get()]
+        self.draw_maze(player.maze)
+        # the solver gets the generated maze itself, the replay's maze is only for showing the generation
+        self.play(player, lambda changed: self.draw_walls(player.maze, changed),
+                  maze_generator.suggested_iteration_size * fast_forward, lambda: solver(maze_generator.maze))
+
+    def play(self, player: ReplayPlayer, show_frame: Callable[[List[int]], None], speed: int,
+             finished: Optional[Callable[[], None]] = None) -> None:
+        # Plays the replay from the start. show_frame gets the indexes of the cells that changed in every frame,
+        # finished is called once the replay has been played to the end.
+        self.player = player
+        self.show_frame = show_frame
+        self.finished = finished
+        self.position.config(to=len(player.replay))
+        self.position.set(0)
+        self.speed.set(speed)
+
+    def play_frame(self) -> None:
+        player = self.player
+        if player and self.playing and player.frame < len(player.replay):
+            self.show(player.step(self.speed.get()))
+            self.position.set(player.frame)
+        self.after(10, self.play_frame)
+
+    def scrub(self, value: str) -> None:
+        # the position slider was moved: go to that frame of the replay
+        if self.player and int(value) != self.player.frame:
+            self.show(self.player.seek(int(value)))
+
+    def show(self, changed: List[int]) -> None:
+        self.show_frame(changed)
+        if self.player.frame == len(self.player.replay) and self.finished:
+            finished, self.finished = self.finished, None
+            finished()
 
-        def generate():
-            nonlocal maze
-            try:
-                for _ in range(maze_generator.suggested_iteration_size * fast_forward):
-                    maze = next(mazes)
-            except StopIteration:
-                self.draw_maze(maze)
-                solver(maze)
-            else:
-                self.draw_maze(maze)
-                self.after(10, generate)
-
-        generate()
+    def toggle_playing(self) -> None:
+        self.playing = not self.playing
+        self.play_button.config(text="Pause" if self.playing else "Play")
 
 
 if __name__ == "__main__":
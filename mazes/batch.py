@@ -0,0 +1,72 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Type, Sequence, Optional, List, Tuple, Callable, Iterable, Any
+
+from .maze import Maze
+from .generators import MazeGenerator
+from .solvers import MazeSolver
+
+__all__ = ["generate_many", "solve_many", "run_tasks", "generate_task", "solve_task"]
+
+
+# Generating and solving lots of mazes at once, spread out over multiple processes.
+# Mazes travel between the processes as the bytes of their compact grid,
+# which is a lot cheaper than pickling anything else.
+# run_tasks() spreads any function over the worker processes (mazes.stats uses it too).
+# generate_task() and solve_task() are the functions that run in the worker processes,
+# they can be handed to other process pools as well (mazes.service does that).
+
+
+def generate_many(generator_class: Type[MazeGenerator], columns: int, rows: int, count: int,
+                  seeds: Optional[Sequence[int]] = None, workers: Optional[int] = None) -> List[Maze]:
+    # Generates count mazes, every one of them with its own seed (defaults to 0, 1, 2, ...)
+    # so the results are reproducible regardless of the number of workers.
+    if seeds is None:
+        seeds = range(count)
+    elif len(seeds) != count:
+        raise ValueError("there must be a seed for every maze")
+    tasks = [(generator_class, columns, rows, seed) for seed in seeds]
+    mazes = []
+    for seed, grid in zip(seeds, run_tasks(generate_task, tasks, workers)):
+        maze = Maze(columns, rows, bytearray(grid))
+        maze.seed = seed
+        maze.generator = generator_class.__name__
+        mazes.append(maze)
+    return mazes
+
+
+def solve_many(solver_class: Type[MazeSolver], mazes: Sequence[Maze], start: Tuple[int, int] = (0, 0),
+               goal: Optional[Tuple[int, int]] = None, workers: Optional[int] = None) -> List[Tuple[str, int]]:
+    # Solves all mazes, returns the (path, iterations) result for each of them.
+    # The costs of weighted mazes are sent along with their grid.
+    tasks = [(solver_class, maze.num_columns, maze.num_rows, bytes(maze.grid), maze.costs, start, goal)
+             for maze in mazes]
+    return list(run_tasks(solve_task, tasks, workers))
+
+
+def run_tasks(function: Callable[[tuple], Any], tasks: List[tuple], workers: Optional[int] = None) -> Iterable[Any]:
+    # Calls the function for every task, in a pool of worker processes (defaults to one per CPU),
+    # and returns the results in the order of the tasks. The function must be a module level function,
+    # so that the workers can unpickle it; with a single worker or task it all runs in this process.
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        return map(function, tasks)
+    # hand out the tasks in chunks so the overhead of passing them between processes stays small
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(function, tasks, chunksize=chunksize))
+
+
+def generate_task(task: tuple) -> bytes:
+    # (generator class, columns, rows, seed) -> the bytes of the generated maze's grid
+    generator_class, columns, rows, seed = task
+    return bytes(generator_class(columns, rows, seed).generate().grid)
+
+
+def solve_task(task: tuple) -> Tuple[str, int]:
+    # (solver class, columns, rows, grid bytes, costs array or None, start, goal)
+    # -> the (path, iterations) of the solver
+    solver_class, columns, rows, grid, costs, start, goal = task
+    maze = Maze(columns, rows, bytearray(grid))
+    maze.costs = costs
+    return solver_class().solve(maze, start, goal)
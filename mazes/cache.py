@@ -0,0 +1,112 @@
+import os
+import struct
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Tuple, Optional, Generator
+
+from .maze import Maze, DOORS
+from .solvers import MazeSolver
+
+__all__ = ["CachedSolver"]
+
+
+_doors_only = bytes(cell & DOORS for cell in range(256))
+_key_header = struct.Struct("<IIIIII")
+_entry_overhead = 200   # rough number of bytes that a cached solution takes apart from its path
+
+
+class CachedSolver(MazeSolver):
+    """
+    Wraps another solver and remembers the results of its solve(), so solving the same maze again is just a lookup.
+    Solutions are keyed by a hash of the doors of all cells (straight from the maze's grid buffer),
+    the start and goal cells, and the wrapped solver's class.
+    The cache in memory holds up to max_size bytes of solutions, the least recently used ones are dropped first.
+    With a directory, solutions are also stored there as files (for instance next to the saved mazes),
+    so they survive between runs.
+    solve_generator() and visit_generator() aren't cached, because the intermediate steps are the point of them.
+    """
+
+    def __init__(self, solver: MazeSolver, max_size: int = 1 << 26, directory: Optional[str] = None) -> None:
+        self.solver = solver
+        self.max_size = max_size
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._solutions: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+
+    def solve(self, maze: Maze, start: Tuple[int, int] = (0, 0),
+              goal: Optional[Tuple[int, int]] = None) -> Tuple[str, int]:
+        key = self.key(maze, start, goal)
+        solution = self._solutions.get(key)
+        if solution is not None:
+            self._solutions.move_to_end(key)
+        elif self.directory:
+            solution = self._load(key)
+            if solution is not None:
+                self._remember(key, solution)
+        if solution is not None:
+            self.hits += 1
+            if self.instrument:
+                self.instrument.count("cache_hits")
+            return solution
+        self.misses += 1
+        if self.instrument:
+            self.instrument.count("cache_misses")
+        solution = self.solver.solve(maze, start, goal)
+        self._remember(key, solution)
+        if self.directory:
+            self._store(key, solution)
+        return solution
+
+    def solve_generator(self, maze: Maze, start: Tuple[int, int] = (0, 0),
+                        goal: Optional[Tuple[int, int]] = None) -> Generator[str, None, None]:
+        return self.solver.solve_generator(maze, start, goal)
+
+    def visit_generator(self, maze: Maze, start: Tuple[int, int] = (0, 0),
+                        goal: Optional[Tuple[int, int]] = None) -> Generator[Tuple[int, str], None, Optional[str]]:
+        return self.solver.visit_generator(maze, start, goal)
+
+    def key(self, maze: Maze, start: Tuple[int, int] = (0, 0), goal: Optional[Tuple[int, int]] = None) -> str:
+        # The hash covers only the doors (and costs) of the cells: the visited bits and tags don't change the solution.
+        if goal is None:
+            goal = (maze.num_columns - 1, maze.num_rows - 1)
+        digest = blake2b(digest_size=20)
+        digest.update(_key_header.pack(maze.num_columns, maze.num_rows, start[0], start[1], goal[0], goal[1]))
+        digest.update(type(self.solver).__name__.encode())
+        digest.update(maze.grid[:].translate(_doors_only))
+        if maze.costs is not None:
+            digest.update(b"costs")
+            digest.update(maze.costs)
+        return digest.hexdigest()
+
+    def clear(self) -> None:
+        # forgets the solutions in memory (not the ones stored on disk)
+        self._solutions.clear()
+        self.size = 0
+
+    def _remember(self, key: str, solution: Tuple[str, int]) -> None:
+        self._solutions[key] = solution
+        self.size += len(solution[0]) + _entry_overhead
+        while self.size > self.max_size and self._solutions:
+            _, (path, _) = self._solutions.popitem(last=False)
+            self.size -= len(path) + _entry_overhead
+
+    def _load(self, key: str) -> Optional[Tuple[str, int]]:
+        try:
+            with open(os.path.join(self.directory, key + ".solution")) as file:
+                iterations, path = file.read().split("\n", 1)
+                return path, int(iterations)
+        except (OSError, ValueError):
+            return None     # not there or not readable: just solve it again
+
+    def _store(self, key: str, solution: Tuple[str, int]) -> None:
+        # written under a temporary name first, so other processes never read a partial file
+        path, iterations = solution
+        filename = os.path.join(self.directory, key + ".solution")
+        temporary = "{}.{}.tmp".format(filename, os.getpid())
+        with open(temporary, "w") as file:
+            file.write("{}\n{}".format(iterations, path))
+        os.replace(temporary, filename)
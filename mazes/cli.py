@@ -0,0 +1,146 @@
+import sys
+from typing import List, Optional, Dict, Any, Callable
+
+__all__ = ["main", "generators", "solvers"]
+
+
+# Command line interface, run it with python -m mazes:
+#
+#   python -m mazes generate 40 20 --generator wilson --seed 1 --output maze.bin
+#   python -m mazes solve maze.bin --solver astar
+#   python -m mazes render maze.bin
+#   python -m mazes bench --generator kruskal --solver bfs --size 300
+#
+# It's meant to be run many times in a row from scripts, so it starts quickly: the generators and solvers
+# are looked up by name in the tables below, and only the module of the one that's used is imported.
+# The same goes for the file format and the text rendering, they're only imported by the commands that use them.
+
+generators: Dict[str, str] = {
+    "depthfirst": "mazes.generators:DepthFirstGenerator",
+    "huntandkill": "mazes.generators:HuntAndKillGenerator",
+    "kruskal": "mazes.generators:KruskalGenerator",
+    "wilson": "mazes.generators:WilsonGenerator",
+    "binarytree": "mazes.generators:BinaryTreeGenerator",
+    "sidewinder": "mazes.generators:SidewinderGenerator",
+    "eller": "mazes.generators:EllerGenerator",
+    "tiled": "mazes.tiled:TiledGenerator",
+}
+
+solvers: Dict[str, str] = {
+    "bfs": "mazes.solvers:BreadthFirstSolver",
+    "dfs": "mazes.solvers:DepthFirstSolver",
+    "astar": "mazes.solvers:AStarSolver",
+    "bidirectional": "mazes.solvers:BidirectionalBFSSolver",
+    "dijkstra": "mazes.solvers:DijkstraSolver",
+}
+
+
+def load(name: str) -> Any:
+    # imports "module:attribute" and returns the attribute
+    module, _, attribute = name.partition(":")
+    return getattr(__import__(module, fromlist=[attribute]), attribute)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m mazes", description="generate, solve and render mazes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("generate", help="generate a maze, and save it or print it as text")
+    command.add_argument("columns", type=int)
+    command.add_argument("rows", type=int)
+    command.add_argument("-g", "--generator", choices=generators, default="depthfirst")
+    command.add_argument("-s", "--seed", type=int)
+    command.add_argument("--braid", type=float, default=0.0, help="fraction of the dead ends to remove")
+    command.add_argument("-o", "--output", help="save the maze in this file, instead of printing it")
+    command.add_argument("--compression", choices=["zlib", "lzma"])
+    command.set_defaults(function=generate)
+
+    command = commands.add_parser("solve", help="solve a saved maze, and print the path (as n, e, s and w steps)")
+    command.add_argument("maze", help="maze file")
+    command.add_argument("-S", "--solver", choices=solvers, default="bfs")
+    command.add_argument("--start", type=int, nargs=2, default=(0, 0), metavar=("X", "Y"))
+    command.add_argument("--goal", type=int, nargs=2, metavar=("X", "Y"), help="default is the bottom right cell")
+    command.set_defaults(function=solve)
+
+    command = commands.add_parser("render", help="print a saved maze as text")
+    command.add_argument("maze", help="maze file")
+    command.add_argument("--wall", default="#")
+    command.add_argument("--space", default=" ")
+    command.set_defaults(function=render)
+
+    command = commands.add_parser("bench", help="time a generator and a solver")
+    command.add_argument("-g", "--generator", choices=generators, default="depthfirst")
+    command.add_argument("-S", "--solver", choices=solvers, default="bfs")
+    command.add_argument("--size", type=int, default=300, help="number of columns and rows")
+    command.add_argument("--repeat", type=int, default=5, help="number of timed runs")
+    command.add_argument("-s", "--seed", type=int, default=12345)
+    command.set_defaults(function=bench)
+
+    options = parser.parse_args(args)
+    try:
+        return options.function(options)
+    except (OSError, ValueError) as x:
+        print("error:", x, file=sys.stderr)
+        return 1
+
+
+def generate(options: Any) -> int:
+    generator = load(generators[options.generator])(options.columns, options.rows, seed=options.seed)
+    if options.output is None and not options.braid and hasattr(generator, "generate_rows"):
+        # the row by row generators are streamed straight into the text, without keeping the maze in memory
+        from .text import write_ascii
+        write_ascii(generator.generate_rows(), options.columns, sys.stdout)
+        return 0
+    maze = generator.generate()
+    if options.braid:
+        generator.braid(options.braid)
+    if options.output:
+        maze.save(options.output, options.compression)
+    else:
+        from .text import write_ascii, maze_rows
+        write_ascii(maze_rows(maze), maze.num_columns, sys.stdout)
+    return 0
+
+
+def solve(options: Any) -> int:
+    from .maze import Maze
+    maze = Maze.load(options.maze)
+    goal = tuple(options.goal) if options.goal else None
+    path, _ = load(solvers[options.solver])().solve(maze, tuple(options.start), goal)
+    print(path)
+    return 0
+
+
+def render(options: Any) -> int:
+    from .maze import Maze
+    from .text import write_ascii, maze_rows
+    maze = Maze.load(options.maze, mapped=True)
+    write_ascii(maze_rows(maze), maze.num_columns, sys.stdout, options.wall, options.space)
+    return 0
+
+
+def bench(options: Any) -> int:
+    generator_class = load(generators[options.generator])
+    solver_class = load(solvers[options.solver])
+    size = options.size
+    _report("generate", size, _timings(lambda: generator_class(size, size, seed=options.seed).generate(),
+                                       options.repeat))
+    maze = generator_class(size, size, seed=options.seed).generate()
+    _report("solve", size, _timings(lambda: solver_class().solve(maze), options.repeat))
+    return 0
+
+
+def _timings(function: Callable[[], Any], repeat: int) -> List[float]:
+    import time
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _report(name: str, size: int, times: List[float]) -> None:
+    import statistics
+    print("{:8s} {}x{}  min {:.4f}s  median {:.4f}s".format(name, size, size, min(times), statistics.median(times)))
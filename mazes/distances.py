@@ -0,0 +1,55 @@
+from array import array
+from typing import Iterable, Optional, Tuple
+
+from .maze import Maze, dxdy, direction_bits
+
+__all__ = ["distance_field"]
+
+
+def distance_field(maze: Maze, sources: Iterable[Tuple[int, int]],
+                   targets: Optional[Iterable[Tuple[int, int]]] = None) -> array:
+    # The number of steps from the nearest of the source cells to every cell of the maze, as a flat array
+    # of 32 bits ints indexed like the maze's grid (-1 for cells that weren't reached).
+    # It's a single breadth-first flood from all sources at once. With targets, the flood stops as soon as
+    # all of them have been reached; cells farther away than the last target are left at -1 then.
+    # No targets (None or empty) floods the whole maze.
+    # The array supports the buffer protocol, numpy.frombuffer(field, dtype=numpy.int32) wraps it without copying.
+    grid = maze.grid[:]
+    columns = maze.num_columns
+    # index offsets to the neighbors that can be reached through the doors, for every cell mask
+    steps = [tuple(dy * columns + dx for direction, (dx, dy) in dxdy.items() if cell & direction_bits[direction])
+             for cell in range(256)]
+    distances = [-1] * len(grid)
+    order = []
+    for index in _indexes(maze, sources):
+        if distances[index] < 0:
+            distances[index] = 0
+            order.append(index)
+    wanted = bytearray(len(grid))
+    has_targets = False
+    targets_left = 0
+    for index in _indexes(maze, targets or []):
+        has_targets = True
+        if distances[index] < 0 and not wanted[index]:
+            wanted[index] = 1
+            targets_left += 1
+    if not has_targets or targets_left:
+        for index in order:     # (the list grows while it's being iterated over, it's the queue)
+            distance = distances[index] + 1
+            for step in steps[grid[index]]:
+                neighbor = index + step
+                if distances[neighbor] < 0:
+                    distances[neighbor] = distance
+                    order.append(neighbor)
+                    if wanted[neighbor]:
+                        targets_left -= 1
+                        if not targets_left:
+                            return array("i", distances)
+    return array("i", distances)
+
+
+def _indexes(maze: Maze, cells: Iterable[Tuple[int, int]]) -> Iterable[int]:
+    for x, y in cells:
+        if not (0 <= x < maze.num_columns and 0 <= y < maze.num_rows):
+            raise ValueError("cell is outside the maze")
+        yield y * maze.num_columns + x
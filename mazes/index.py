@@ -0,0 +1,109 @@
+from array import array
+from typing import Tuple, List
+
+from .maze import Maze, dxdy, door_strings, DOORS, opposite_direction_table
+
+__all__ = ["MazeIndex"]
+
+
+class MazeIndex:
+    """
+    Answers shortest distance and path queries between any two cells of a perfect maze,
+    without searching the maze again for every query.
+    A perfect maze is a spanning tree of its cells. The index roots that tree in the top left cell,
+    and finds the lowest common ancestor of two cells by binary lifting:
+    for every cell it stores its ancestors 1, 2, 4, 8... levels up.
+    Building the index takes O(n log n) time and memory, for n cells.
+    A distance query takes O(log n), a path query O(log n) plus the length of the path.
+    """
+
+    def __init__(self, maze: Maze) -> None:
+        self.maze = maze
+        self.columns = maze.num_columns
+        grid = maze.grid
+        offsets = {direction: dy * maze.num_columns + dx for direction, (dx, dy) in dxdy.items()}
+        # (the walk uses lists, which are faster than arrays, but the index stores compact arrays)
+        parents = [-1] * len(grid)
+        parents[0] = 0
+        depths = [0] * len(grid)
+        came_from = bytearray(len(grid))     # direction taken from the parent into the cell
+        # iterative depth-first walk over the tree, a recursive one would hit the recursion limit
+        stack = [0]
+        visited = 1
+        while stack:
+            index = stack.pop()
+            parent = parents[index]
+            depth = depths[index] + 1
+            for direction in door_strings[grid[index] & DOORS]:
+                neighbor = index + offsets[direction]
+                if neighbor == parent:
+                    continue
+                if parents[neighbor] >= 0:
+                    raise ValueError("maze is not a perfect maze, it contains loops")
+                parents[neighbor] = index
+                depths[neighbor] = depth
+                came_from[neighbor] = ord(direction)
+                stack.append(neighbor)
+                visited += 1
+        if visited != len(grid):
+            raise ValueError("maze is not a perfect maze, not all cells are connected")
+        self.depths = array("i", depths)
+        self.came_from = came_from
+        # ancestors[k][i] is the ancestor of cell i that is 2**k levels up (or the root)
+        self.ancestors: List[array] = [array("i", parents)]
+        max_depth = max(depths)
+        previous = parents
+        while 1 << len(self.ancestors) <= max_depth:
+            previous = [previous[ancestor] for ancestor in previous]
+            self.ancestors.append(array("i", previous))
+
+    def distance(self, a: Tuple[int, int], b: Tuple[int, int]) -> int:
+        # the number of steps on the path between cells a and b
+        index_a = self._index(a)
+        index_b = self._index(b)
+        common = self._common_ancestor(index_a, index_b)
+        return self.depths[index_a] + self.depths[index_b] - 2 * self.depths[common]
+
+    def path(self, a: Tuple[int, int], b: Tuple[int, int]) -> str:
+        # the path from cell a to cell b, in the same form as the paths produced by the solvers
+        index_a = self._index(a)
+        index_b = self._index(b)
+        common = self._common_ancestor(index_a, index_b)
+        parents = self.ancestors[0]
+        up = bytearray()
+        while index_a != common:
+            up.append(self.came_from[index_a])
+            index_a = parents[index_a]
+        down = bytearray()
+        while index_b != common:
+            down.append(self.came_from[index_b])
+            index_b = parents[index_b]
+        down.reverse()
+        return up.decode().translate(opposite_direction_table) + down.decode()
+
+    def _index(self, cell: Tuple[int, int]) -> int:
+        x, y = cell
+        if not (0 <= x < self.maze.num_columns and 0 <= y < self.maze.num_rows):
+            raise ValueError("cell is outside the maze")
+        return y * self.columns + x
+
+    def _common_ancestor(self, a: int, b: int) -> int:
+        depths = self.depths
+        if depths[a] < depths[b]:
+            a, b = b, a
+        # first lift a to the same depth as b
+        difference = depths[a] - depths[b]
+        level = 0
+        while difference:
+            if difference & 1:
+                a = self.ancestors[level][a]
+            difference >>= 1
+            level += 1
+        if a == b:
+            return a
+        # then lift both as far as possible while they remain different
+        for ancestors in reversed(self.ancestors):
+            if ancestors[a] != ancestors[b]:
+                a = ancestors[a]
+                b = ancestors[b]
+        return self.ancestors[0][a]
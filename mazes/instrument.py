@@ -0,0 +1,83 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Iterator, Any
+
+__all__ = ["Instrument", "Collector"]
+
+
+class Instrument:
+    """
+    Receives measurements from a generator or solver while it runs: counters, peak values,
+    and the time spent in the phases of the algorithm. Set it as the generator's or solver's instrument attribute.
+    That attribute is None by default, and then the algorithms only have to check for that in their loops,
+    so the measurements cost next to nothing when they're not used.
+    This base class ignores all measurements, subclasses decide what to do with them.
+    """
+
+    def count(self, name: str, amount: int = 1) -> None:
+        pass
+
+    def peak(self, name: str, value: int) -> None:
+        pass
+
+    def add_time(self, name: str, seconds: float) -> None:
+        pass
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        # times the code in the with block
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+
+class Collector(Instrument):
+    """
+    Instrument that collects all measurements. They can be exported as JSON,
+    or the phase timings as a profile statistics file that the pstats module
+    (and other tools that read cProfile output) can load.
+    """
+
+    def __init__(self) -> None:
+        self.counters: Dict[str, int] = {}
+        self.peaks: Dict[str, int] = {}
+        self.timings: Dict[str, List[Any]] = {}    # name -> [number of times, total seconds]
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def peak(self, name: str, value: int) -> None:
+        if value > self.peaks.get(name, 0):
+            self.peaks[name] = value
+
+    def add_time(self, name: str, seconds: float) -> None:
+        timing = self.timings.setdefault(name, [0, 0.0])
+        timing[0] += 1
+        timing[1] += seconds
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.peaks.clear()
+        self.timings.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "counters": dict(self.counters),
+            "peaks": dict(self.peaks),
+            "phases": {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in self.timings.items()}
+        }
+
+    def to_json(self) -> str:
+        import json
+        return json.dumps(self.as_dict(), indent=2)
+
+    def dump_stats(self, path: str) -> None:
+        # Writes the phase timings in the marshal format of cProfile, so pstats.Stats(path) can read them.
+        # Every phase is a 'function' in the 'file' mazes: {(file, line, function): (calls, calls, time, time, callers)}
+        import marshal
+        stats = {("mazes", 0, name): (calls, calls, seconds, seconds, {})
+                 for name, (calls, seconds) in self.timings.items()}
+        with open(path, "wb") as file:
+            marshal.dump(stats, file)
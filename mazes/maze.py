@@ -1,4 +1,5 @@
-from typing import List, Any
+from array import array
+from typing import List, Any, Dict, Optional, Tuple, Union, Iterator
 
 dxdy = {
     "n": (0, -1),
@@ -14,6 +15,39 @@ opposite_direction = {
     "w": "e",
 }
 
+# str.translate() table that replaces every direction in a path by the opposite direction
+opposite_direction_table = str.maketrans("nesw", "swne")
+
+# Every cell of a Maze is a single byte in a flat grid buffer:
+# the lower 4 bits are its doors, the next bit tells if the cell has been visited (is open).
+N, E, S, W = 1, 2, 4, 8
+DOORS = N | E | S | W
+VISITED = 16
+
+direction_bits = {
+    "n": N,
+    "e": E,
+    "s": S,
+    "w": W,
+}
+
+opposite_bits = {
+    N: S,
+    E: W,
+    S: N,
+    W: E,
+}
+
+bit_directions = {
+    N: "n",
+    E: "e",
+    S: "s",
+    W: "w",
+}
+
+# the doors string (in "nesw" order) for every possible 4-bit door mask
+door_strings = ["".join(d for d in "nesw" if mask & direction_bits[d]) for mask in range(16)]
+
 
 class Cell:
     def __init__(self) -> None:
@@ -22,8 +56,175 @@ class Cell:
         self.doors = ""  # n, e, s, w  possible
 
 
+class CellView:
+    """
+    Cell-like object that reads and writes a single cell in the compact grid of a Maze.
+    Only used for compatibility with code that works with maze.cells[y][x],
+    algorithms should access the maze's grid buffer directly.
+    """
+    __slots__ = ("maze", "index")
+
+    def __init__(self, maze: "Maze", index: int) -> None:
+        self.maze = maze
+        self.index = index
+
+    @property
+    def doors(self) -> str:
+        return door_strings[self.maze.grid[self.index] & DOORS]
+
+    @doors.setter
+    def doors(self, doors: str) -> None:
+        mask = 0
+        for direction in doors:
+            mask |= direction_bits[direction]
+        grid = self.maze.grid
+        grid[self.index] = (grid[self.index] & ~DOORS) | mask
+
+    @property
+    def open(self) -> bool:
+        return bool(self.maze.grid[self.index] & VISITED)
+
+    @open.setter
+    def open(self, value: bool) -> None:
+        grid = self.maze.grid
+        if value:
+            grid[self.index] |= VISITED
+        else:
+            grid[self.index] &= ~VISITED
+
+    @property
+    def tag(self) -> Any:
+        return self.maze.tags.get(self.index)
+
+    @tag.setter
+    def tag(self, value: Any) -> None:
+        if value is None:
+            self.maze.tags.pop(self.index, None)
+        else:
+            self.maze.tags[self.index] = value
+
+
+class CellRow:
+    """
+    Compatibility view of a single row of a Maze. The Cell-like objects are only created when they're accessed,
+    so maze.cells[y][x] costs the same regardless of the width of the maze.
+    """
+    __slots__ = ("maze", "offset")
+
+    def __init__(self, maze: "Maze", offset: int) -> None:
+        self.maze = maze
+        self.offset = offset
+
+    def __len__(self) -> int:
+        return self.maze.num_columns
+
+    def __getitem__(self, column: Union[int, slice]) -> Union[CellView, List[CellView]]:
+        if isinstance(column, slice):
+            return [CellView(self.maze, self.offset + x) for x in range(self.maze.num_columns)[column]]
+        return CellView(self.maze, self.offset + range(self.maze.num_columns)[column])
+
+    def __iter__(self) -> Iterator[CellView]:
+        for column in range(self.maze.num_columns):
+            yield CellView(self.maze, self.offset + column)
+
+
+class CellGrid:
+    """Compatibility view that presents the compact grid of a Maze as rows of Cell-like objects."""
+    __slots__ = ("maze",)
+
+    def __init__(self, maze: "Maze") -> None:
+        self.maze = maze
+
+    def __len__(self) -> int:
+        return self.maze.num_rows
+
+    def __getitem__(self, row: int) -> CellRow:
+        return CellRow(self.maze, range(self.maze.num_rows)[row] * self.maze.num_columns)
+
+    def __iter__(self) -> Iterator[CellRow]:
+        for row in range(self.maze.num_rows):
+            yield self[row]
+
+
 class Maze:
-    def __init__(self, cells: List[List[Cell]]) -> None:
-        self.cells = cells
-        self.num_rows = len(cells)
-        self.num_columns = len(cells[0])
+    """
+    A maze of columns x rows cells, stored as a flat bytearray with one byte per cell.
+    The cell at (x, y) is at index y * num_columns + x. Its lower 4 bits are
+    the door mask (N, E, S, W) and the VISITED bit marks it as open.
+    Cell tags (used by the solvers to mark cells) are kept in a sparse dict by cell index.
+    A weighted maze also has costs: a parallel array with the cost of moving into every cell.
+    For compatibility, Maze(cells) still accepts rows of Cell objects too, like Maze.from_cells().
+    """
+
+    def __init__(self, columns: Union[int, List[List[Cell]]], rows: Optional[int] = None,
+                 grid: Optional[bytearray] = None) -> None:
+        cells = None
+        if not isinstance(columns, int):
+            cells = columns
+            columns, rows = len(cells[0]), len(cells)
+        elif rows is None:
+            raise TypeError("the number of rows is missing")
+        if grid is None:
+            grid = bytearray(columns * rows)
+        elif len(grid) != columns * rows:
+            raise ValueError("grid size doesn't match the maze dimensions")
+        self.num_columns = columns
+        self.num_rows = rows
+        self.grid = grid
+        self.tags: Dict[int, Any] = {}
+        self.seed: Optional[int] = None     # seed and name of the generator that made this maze, if known
+        self.generator: Optional[str] = None
+        self.costs: Optional[array] = None  # cost of moving into each cell, None means every move costs 1
+        if cells is not None:
+            for y, row in enumerate(cells):
+                for x, cell in enumerate(row):
+                    index = y * columns + x
+                    mask = VISITED if cell.open else 0
+                    for direction in cell.doors:
+                        mask |= direction_bits[direction]
+                    grid[index] = mask
+                    if cell.tag is not None:
+                        self.tags[index] = cell.tag
+
+    @classmethod
+    def from_cells(cls, cells: List[List[Cell]]) -> "Maze":
+        # converts a maze made of rows of Cell objects
+        return cls(cells)
+
+    @classmethod
+    def load(cls, path: str, mapped: bool = False) -> "Maze":
+        # Loads a maze saved with save(). When mapped is true, uncompressed maze files are memory mapped
+        # instead of loaded, and the grid is a read-only PackedGrid that unpacks cells when they're accessed.
+        from .storage import load_maze
+        return load_maze(path, mapped)
+
+    def save(self, path: str, compression: Optional[str] = None) -> None:
+        # Saves the maze in a compact binary file (4 bits per cell), optionally compressed with "zlib" or "lzma".
+        from .storage import save_maze
+        save_maze(self, path, compression)
+
+    @property
+    def cells(self) -> CellGrid:
+        return CellGrid(self)
+
+    def doors(self, x: int, y: int) -> str:
+        return door_strings[self.grid[y * self.num_columns + x] & DOORS]
+
+    def path_cost(self, path: str, start: Tuple[int, int] = (0, 0)) -> int:
+        # the total cost of following the path from the start cell: the sum of the costs of the cells moved into
+        if self.costs is None:
+            return len(path)
+        offsets = {direction: dy * self.num_columns + dx for direction, (dx, dy) in dxdy.items()}
+        index = start[1] * self.num_columns + start[0]
+        cost = 0
+        for direction in path:
+            index += offsets[direction]
+            cost += self.costs[index]
+        return cost
+
+    def carve(self, x: int, y: int, direction: str) -> None:
+        # opens the door in the given direction, and the opposite door in the neighboring cell
+        dx, dy = dxdy[direction]
+        bit = direction_bits[direction]
+        self.grid[y * self.num_columns + x] |= bit
+        self.grid[(y + dy) * self.num_columns + x + dx] |= opposite_bits[bit]
@@ -0,0 +1,326 @@
+import struct
+import sys
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+from .maze import Maze, N, E, S, W, DOORS, VISITED
+from .generators import MazeGenerator
+from .solvers import MazeSolver
+
+__all__ = ["Replay", "ReplayPlayer", "record_generation", "record_solve"]
+
+
+# Replays are the recorded events of a maze generation or of a solver's search, so they can be played back
+# at any speed, and scrubbed back and forth, without running the algorithm again.
+#
+# Every event is a cell index and a kind:
+#   0-3: a door carved from the cell to the n, e, s or w (and from the neighbor back into it)
+#   4-7: a solver visited the cell, with a step n, e, s or w from the cell it came from
+#   8:   a solver visited one of the cells its search started from
+# An event is stored as a single varint (7 bits per byte, lowest bits first, the high bit is set on all bytes
+# but the last) of zigzag(difference with the cell where the previous event ended) * 9 + kind.
+# A carve ends in the neighbor that the door leads to, a visit ends in the visited cell itself.
+# Most events continue where the previous one ended or next to it, so they mostly take just a single byte.
+# Every keyframe_interval'th event is a keyframe: its difference is taken from 0 instead of from the previous
+# event, so decoding can start there. The data offsets of the keyframes are kept, to seek to any event quickly.
+# All events can be undone (a door is carved only once, a cell is visited only once), so a player
+# goes backwards by undoing the events instead of playing everything again from the start.
+#
+# Replay file format (all numbers little endian):
+#   header:   magic "MZRP", version (u8), kind (u8: 0 generate, 1 solve), flags (u8), padding (1 byte),
+#             columns (u32), rows (u32), keyframe interval (u32), seed (i64), number of events (u64),
+#             start cell index (u32), goal cell index (u32), length of the generator name (u16),
+#             length of the solution path (u32), data length (u64)
+#   followed by the generator name (utf-8), the solution path (ascii),
+#   the data offsets of the keyframes (u32 each), and the event data.
+
+MAGIC = b"MZRP"
+VERSION = 1
+_header = struct.Struct("<4sBBBxIIIqQIIHIQ")
+_FLAG_SEED = 1
+_kinds = ("generate", "solve")
+
+CARVE, VISIT, ORIGIN = 0, 4, 8     # the first event kind of the carves and of the visits, and the origin visits
+_directions = {"n": 0, "e": 1, "s": 2, "w": 3}
+_door_bits = (N, E, S, W)
+_opposite_bits = (S, W, N, E)
+
+
+class Replay:
+    """
+    The recorded events of a maze generation (kind "generate") or of a solver's search (kind "solve"),
+    in a compact varint encoded stream. Use record_generation() or record_solve() to make one,
+    and a ReplayPlayer to play it back. The frames of a replay are numbered 0 to len(replay):
+    frame n shows the state after the first n events.
+    """
+
+    def __init__(self, kind: str, columns: int, rows: int, keyframe_interval: int = 1024) -> None:
+        if kind not in _kinds:
+            raise ValueError("unknown replay kind: " + kind)
+        if keyframe_interval < 1:
+            raise ValueError("keyframe interval must be at least 1")
+        self.kind = kind
+        self.columns = columns
+        self.rows = rows
+        self.keyframe_interval = keyframe_interval
+        self.seed: Optional[int] = None         # seed and name of the generator, if known
+        self.generator: Optional[str] = None
+        self.start = 0      # cell indexes of the start and goal of a solve
+        self.goal = 0
+        self.solution = ""  # the path the solver found, empty if there is none
+        self.data = bytearray()
+        self.keyframes = array("I")     # data offset of every keyframe
+        self._offsets = (-columns, 1, columns, -1)  # to the neighbor in the n, e, s, w direction
+        self._length = 0
+        self._previous = 0
+
+    def __len__(self) -> int:
+        # the number of events
+        return self._length
+
+    def add(self, index: int, kind: int) -> None:
+        # appends an event
+        if self._length % self.keyframe_interval == 0:
+            self.keyframes.append(len(self.data))
+            self._previous = 0
+        difference = index - self._previous
+        value = (difference * 2 if difference >= 0 else -difference * 2 - 1) * 9 + kind
+        data = self.data
+        while value > 127:
+            data.append(value & 127 | 128)
+            value >>= 7
+        data.append(value)
+        self._previous = index + self._offsets[kind] if kind < VISIT else index
+        self._length += 1
+
+    def events(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        # Decodes the (cell index, kind) of the events from start up to stop.
+        # Decoding starts at the nearest keyframe, so this never has to skip more than keyframe_interval events.
+        stop = self._length if stop is None else min(stop, self._length)
+        if start >= stop:
+            return
+        interval = self.keyframe_interval
+        number = start - start % interval
+        offset = self.keyframes[number // interval]
+        offsets = self._offsets
+        previous = value = shift = 0
+        for byte in memoryview(self.data)[offset:]:
+            value |= (byte & 127) << shift
+            if byte & 128:
+                shift += 7
+                continue
+            zigzag, kind = divmod(value, 9)
+            if number % interval == 0:
+                previous = 0
+            index = previous + (zigzag >> 1 if not zigzag & 1 else -(zigzag >> 1) - 1)
+            if number >= start:
+                yield index, kind
+            previous = index + offsets[kind] if kind < VISIT else index
+            number += 1
+            if number == stop:
+                return
+            value = shift = 0
+
+    def save(self, path: str) -> None:
+        if self.seed is not None and not -1 << 63 <= self.seed < 1 << 63:
+            raise ValueError("the seed doesn't fit in a replay file, it must be a 64 bits signed integer")
+        name = (self.generator or "").encode()
+        keyframes = array("I", self.keyframes)
+        if sys.byteorder == "big":
+            keyframes.byteswap()
+        with open(path, "wb") as file:
+            file.write(_header.pack(MAGIC, VERSION, _kinds.index(self.kind),
+                                    _FLAG_SEED if self.seed is not None else 0,
+                                    self.columns, self.rows, self.keyframe_interval, self.seed or 0, self._length,
+                                    self.start, self.goal, len(name), len(self.solution), len(self.data)))
+            file.write(name)
+            file.write(self.solution.encode("ascii"))
+            file.write(keyframes.tobytes())
+            file.write(self.data)
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        with open(path, "rb") as file:
+            header = file.read(_header.size)
+            if len(header) < _header.size:
+                raise ValueError("not a replay file")
+            magic, version, kind, flags, columns, rows, keyframe_interval, seed, length, \
+                start, goal, name_length, solution_length, data_length = _header.unpack(header)
+            if magic != MAGIC:
+                raise ValueError("not a replay file")
+            if version != VERSION:
+                raise ValueError("unsupported replay file version: " + str(version))
+            if kind >= len(_kinds) or keyframe_interval < 1:
+                raise ValueError("invalid replay file")
+            replay = cls(_kinds[kind], columns, rows, keyframe_interval)
+            replay.generator = file.read(name_length).decode() or None
+            replay.seed = seed if flags & _FLAG_SEED else None
+            replay.start = start
+            replay.goal = goal
+            replay.solution = file.read(solution_length).decode("ascii")
+            keyframes = (length + keyframe_interval - 1) // keyframe_interval
+            replay.keyframes.frombytes(file.read(keyframes * replay.keyframes.itemsize))
+            if sys.byteorder == "big":
+                replay.keyframes.byteswap()
+            replay.data = bytearray(file.read(data_length))
+            if len(replay.keyframes) != keyframes or len(replay.data) != data_length:
+                raise ValueError("replay file is truncated")
+        replay._length = length
+        return replay
+
+
+class ReplayPlayer:
+    """
+    Plays a replay on a maze: seek() goes to any frame, forwards or backwards, and returns the indexes of
+    the cells that changed, so a display only has to redraw those.
+    A generation replay is played on a new maze without any doors, that ends up as the generated maze.
+    A solve replay must be played on the maze that was solved. The maze itself isn't changed then:
+    the distances array holds the distance of every cell that the solver visited from the cell its search
+    started from, and -1 for the others. It's indexed like the grid, just like the array of distance_field().
+    """
+
+    def __init__(self, replay: Replay, maze: Optional[Maze] = None) -> None:
+        if maze is None:
+            if replay.kind == "solve":
+                raise ValueError("a solve replay has to be played on the maze that was solved")
+            maze = Maze(replay.columns, replay.rows)
+            maze.seed = replay.seed
+            maze.generator = replay.generator
+        elif (maze.num_columns, maze.num_rows) != (replay.columns, replay.rows):
+            raise ValueError("the size of the maze doesn't match the replay")
+        self.replay = replay
+        self.maze = maze
+        self.frame = 0
+        self._offsets = (-replay.columns, 1, replay.columns, -1)   # to the neighbor in the n, e, s, w direction
+        self._current = -1  # cell of the last event that was played
+        self.distances: Optional[array] = None
+        if replay.kind == "solve":
+            self.distances = array("i", [-1]) * len(maze.grid)
+            self._steps = bytearray(len(maze.grid))   # the kind of the visit event of every visited cell
+
+    def step(self, count: int = 1) -> List[int]:
+        # moves count frames forward, or backwards when it's negative
+        return self.seek(self.frame + count)
+
+    def seek(self, frame: int) -> List[int]:
+        frame = max(0, min(frame, len(self.replay)))
+        changed: List[int] = []
+        if frame < self.frame:
+            if frame < self.frame - frame:
+                # quicker to start over than to undo everything
+                self._reset(changed)
+            else:
+                for index, kind in reversed(list(self.replay.events(frame, self.frame))):
+                    self._undo(index, kind, changed)
+                self.frame = frame
+                self._current = next(self.replay.events(frame - 1, frame))[0] if frame else -1
+        for index, kind in self.replay.events(self.frame, frame):
+            self._apply(index, kind, changed)
+            self._current = index
+        self.frame = frame
+        return changed
+
+    @property
+    def current(self) -> int:
+        # the cell of the event of the current frame, -1 at frame 0
+        return self._current
+
+    def came_from(self, index: int) -> int:
+        # The cell that the solver stepped into the given visited cell from,
+        # -1 for the cells its search started from (and for the cells it hasn't visited).
+        kind = self._steps[index]
+        return index - self._offsets[kind - VISIT] if VISIT <= kind < ORIGIN else -1
+
+    def path(self) -> str:
+        # The path of the solver to the cell it visited in the current frame, empty if it hasn't visited any.
+        # At the last frame, this is the solution if the solver found one.
+        # (the paths of the cells visited by a bidirectional search from the goal are paths from the goal)
+        # Walking back over came_from() from the current cell gives the cells of this path, in reverse.
+        index = self._current
+        if self.replay.kind != "solve" or index < 0:
+            return ""
+        steps = self._steps
+        path = bytearray()
+        while steps[index] != ORIGIN:
+            direction = steps[index] - VISIT
+            path.append(b"nesw"[direction])
+            index -= self._offsets[direction]
+        path.reverse()
+        return path.decode()
+
+    def _apply(self, index: int, kind: int, changed: List[int]) -> None:
+        if kind < VISIT:
+            grid = self.maze.grid
+            neighbor = index + self._offsets[kind]
+            grid[index] |= _door_bits[kind] | VISITED
+            grid[neighbor] |= _opposite_bits[kind] | VISITED
+            changed.append(index)
+            changed.append(neighbor)
+        else:
+            distances = self.distances
+            distances[index] = 0 if kind == ORIGIN else distances[index - self._offsets[kind - VISIT]] + 1
+            self._steps[index] = kind
+            changed.append(index)
+
+    def _undo(self, index: int, kind: int, changed: List[int]) -> None:
+        if kind < VISIT:
+            grid = self.maze.grid
+            neighbor = index + self._offsets[kind]
+            grid[index] &= ~_door_bits[kind]
+            grid[neighbor] &= ~_opposite_bits[kind]
+            # cells without any doors left are not part of the maze yet
+            for cell in (index, neighbor):
+                if not grid[cell] & DOORS:
+                    grid[cell] = 0
+            changed.append(index)
+            changed.append(neighbor)
+        else:
+            self.distances[index] = -1
+            self._steps[index] = 0
+            changed.append(index)
+
+    def _reset(self, changed: List[int]) -> None:
+        if self.replay.kind == "solve":
+            changed.extend(index for index, distance in enumerate(self.distances) if distance >= 0)
+            self.distances = array("i", [-1]) * len(self._steps)
+            self._steps = bytearray(len(self._steps))
+        else:
+            grid = self.maze.grid
+            changed.extend(index for index, cell in enumerate(grid) if cell)
+            grid[:] = bytes(len(grid))
+        self.frame = 0
+        self._current = -1
+
+
+def record_generation(generator: MazeGenerator, keyframe_interval: int = 1024) -> Replay:
+    # Generates the maze (the generator must not have generated it yet), and records every door it carves.
+    replay = Replay("generate", generator.columns, generator.rows, keyframe_interval)
+    replay.seed = generator.seed
+    replay.generator = type(generator).__name__
+    columns = generator.columns
+    add = replay.add
+    for events in generator.generate_events(4096):
+        for x, y, direction in events:
+            add(y * columns + x, CARVE + _directions[direction])
+    return replay
+
+
+def record_solve(solver: MazeSolver, maze: Maze, start: Tuple[int, int] = (0, 0),
+                 goal: Optional[Tuple[int, int]] = None, keyframe_interval: int = 1024) -> Replay:
+    # Solves the maze, and records every cell that the solver visits, in the order it visits them.
+    replay = Replay("solve", maze.num_columns, maze.num_rows, keyframe_interval)
+    replay.seed = maze.seed
+    replay.generator = maze.generator
+    columns = maze.num_columns
+    if goal is None:
+        goal = (columns - 1, maze.num_rows - 1)
+    replay.start = start[1] * columns + start[0]
+    replay.goal = goal[1] * columns + goal[0]
+    search = solver.visit_generator(maze, start, goal)
+    try:
+        while True:
+            index, direction = next(search)
+            replay.add(index, VISIT + _directions[direction] if direction else ORIGIN)
+    except StopIteration as result:
+        replay.solution = result.value or ""
+    return replay
@@ -0,0 +1,336 @@
+import asyncio
+import json
+import os
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import blake2b
+from typing import Dict, List, Tuple, Optional, Callable, Any, Sequence
+
+from .maze import Maze
+from .batch import generate_task, solve_task
+from .cli import generators, solvers, load
+
+__all__ = ["MazeService", "MazeClient", "serve"]
+
+
+# Asyncio front end for generating and solving mazes, for use in (web) servers: the CPU work is done in
+# a pool of worker processes, so the event loop stays responsive while mazes are generated and solved.
+#
+# serve() makes a MazeService available over a TCP connection, MazeClient is the other end of that.
+# Every request is a line of JSON, for example:
+#   {"command": "generate", "generator": "depthfirst", "columns": 100, "rows": 50, "seed": 42}
+#   {"command": "solve", "solver": "astar", "columns": 100, "rows": 50, "start": [0, 0], "goal": null}
+# A solve request is followed by the bytes of the maze's grid. For a weighted maze the request has "costs": true,
+# and the grid is followed by the cost of every cell as a 32 bits unsigned int (little endian).
+# Every response is a line of JSON with a "length", followed by that many bytes: the grid of the generated maze,
+# or the solution path. These are sent in chunks, and the server waits for the connection to take every chunk
+# before sending the next one, so large results don't have to be buffered in full. An error response is
+# a line of JSON with just an "error" message. After an error the connection can be used for the next request,
+# except when the request itself can't be read (not JSON, or a solve request without a valid size for the grid
+# that follows it): then the server closes the connection after the error response.
+# Mazes of more than max_cells cells (see serve()) are refused. The grid of a solve request that's too large
+# isn't read at all, so that connection is closed after the error response too.
+
+
+class MazeService:
+    """
+    Runs generate and solve jobs for asyncio code, in a pool of worker processes.
+    The jobs wait in a queue of limited size; when it is full, submitting another job waits until
+    there's room again (backpressure), so a flood of requests can't pile up an unlimited amount of work.
+    Identical requests that come in while the first one is still queued or running are coalesced:
+    they all get the result of that single computation.
+    Use it as an async context manager, or call start() and close().
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_size: int = 100) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.computations = 0   # number of jobs that were actually computed (the others were coalesced)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._runners: List[asyncio.Task] = []
+        self._pending: Dict[tuple, asyncio.Future] = {}     # key of a queued or running job -> its result
+
+    async def __aenter__(self) -> "MazeService":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        # must be called from within the event loop
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._queue = asyncio.Queue(self.queue_size)
+        # one runner per worker process, so there are never more jobs handed to the pool than it can run
+        self._runners = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        self._queue = None      # submitting fails from now on, instead of waiting for runners that are gone
+        for runner in self._runners:
+            runner.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+        self._runners.clear()
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        if self._executor:
+            # waiting for the worker processes to exit blocks, so that's done in a thread
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, cancel_futures=True)
+
+    @property
+    def queued(self) -> int:
+        # number of jobs waiting for a worker
+        return self._queue.qsize() if self._queue else 0
+
+    async def generate(self, generator: str, columns: int, rows: int, seed: Optional[int] = None) -> Maze:
+        # The generator is one of the names in mazes.cli.generators.
+        # Requests without a seed all give different mazes, so they are never coalesced.
+        if generator not in generators:
+            raise ValueError("unknown generator: " + generator)
+        generator_class = load(generators[generator])
+        key = ("generate", generator, columns, rows, seed) if seed is not None else None
+        grid = await self._submit(key, generate_task, (generator_class, columns, rows, seed))
+        maze = Maze(columns, rows, bytearray(grid))
+        maze.seed = seed
+        maze.generator = generator_class.__name__
+        return maze
+
+    async def solve(self, maze: Maze, solver: str = "bfs", start: Tuple[int, int] = (0, 0),
+                    goal: Optional[Tuple[int, int]] = None) -> Tuple[str, int]:
+        # The solver is one of the names in mazes.cli.solvers. Returns the (path, iterations) of the solver.
+        if solver not in solvers:
+            raise ValueError("unknown solver: " + solver)
+        # the costs of a weighted maze go along with the grid, and are part of the key
+        grid = bytes(maze.grid)
+        digest = blake2b(grid, digest_size=20)
+        if maze.costs is not None:
+            digest.update(b"costs")
+            digest.update(_costs_bytes(maze.costs))
+        key = ("solve", solver, maze.num_columns, maze.num_rows, start, goal, digest.digest())
+        return await self._submit(key, solve_task, (load(solvers[solver]), maze.num_columns, maze.num_rows,
+                                                    grid, maze.costs, start, goal))
+
+    async def _submit(self, key: Optional[tuple], function: Callable[[tuple], Any], task: tuple) -> Any:
+        if self._queue is None:
+            raise RuntimeError("the service isn't started")
+        future = self._pending.get(key) if key else None
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            if key:
+                self._pending[key] = future
+            try:
+                await self._queue.put((key, function, task, future))
+            except BaseException:
+                # cancelled while waiting for room in the queue: the others waiting for it can't get a result now
+                self._pending.pop(key, None)
+                future.cancel()
+                raise
+        # shielded, so a request that's cancelled doesn't cancel the job for the others waiting for it
+        return await asyncio.shield(future)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            key, function, task, future = await self._queue.get()
+            try:
+                if future.done():
+                    continue
+                result = await loop.run_in_executor(self._executor, function, task)
+                self.computations += 1
+                if not future.done():
+                    future.set_result(result)
+            except Exception as x:
+                if not future.done():
+                    future.set_exception(x)
+            finally:
+                if key and self._pending.get(key) is future:
+                    del self._pending[key]
+                self._queue.task_done()
+
+
+async def serve(service: MazeService, host: str = "127.0.0.1", port: int = 0,
+                chunk_size: int = 1 << 16, max_cells: int = 1 << 24) -> asyncio.AbstractServer:
+    # Starts serving the requests for the service on a TCP port (port 0 picks a free one,
+    # see server.sockets[0].getsockname()). Returns the server, close it to stop.
+    # Requests for mazes of more than max_cells cells are refused, so a client can't make the server
+    # buffer (or the workers generate) an arbitrarily large maze.
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("a request must be a JSON object")
+                except ValueError as x:
+                    # (json errors are ValueErrors too) it's unknown if a grid follows, so the rest of
+                    # what the client sends can't be made sense of anymore
+                    await _send_error(writer, x, True)
+                    break
+                command = request.get("command")
+                grid = b""
+                costs = None
+                if command == "solve":
+                    # The grid that follows is read before anything else is checked, so that the next request
+                    # is read from the right place whatever is wrong with this one. Without a valid size
+                    # that isn't possible, and the connection is closed after the error response.
+                    columns, rows = request.get("columns"), request.get("rows")
+                    if not (_is_size(columns) and _is_size(rows)):
+                        error = ValueError("a solve request needs the columns and rows of the maze")
+                        await _send_error(writer, error, True)
+                        break
+                    if columns * rows > max_cells:
+                        await _send_error(writer, _too_large(max_cells), True)
+                        break
+                    grid = await reader.readexactly(columns * rows)
+                    if request.get("costs"):
+                        costs = _costs_from_bytes(await reader.readexactly(columns * rows * 4))
+                try:
+                    if command == "generate":
+                        columns, rows = request.get("columns"), request.get("rows")
+                        if _is_size(columns) and _is_size(rows) and columns * rows > max_cells:
+                            raise _too_large(max_cells)
+                        maze = await service.generate(request.get("generator", "depthfirst"),
+                                                      request["columns"], request["rows"], request.get("seed"))
+                        await _send(writer, {"columns": maze.num_columns, "rows": maze.num_rows,
+                                             "seed": maze.seed, "generator": maze.generator}, maze.grid, chunk_size)
+                    elif command == "solve":
+                        goal = request.get("goal")
+                        maze = Maze(columns, rows, bytearray(grid))
+                        maze.costs = costs
+                        path, iterations = await service.solve(maze,
+                                                               request.get("solver", "bfs"),
+                                                               tuple(request.get("start", (0, 0))),
+                                                               tuple(goal) if goal else None)
+                        await _send(writer, {"iterations": iterations}, path.encode(), chunk_size)
+                    else:
+                        raise ValueError("unknown command: " + str(command))
+                except ConnectionError:
+                    raise
+                except Exception as x:
+                    # bad requests, but also failures of the worker processes (such as a BrokenProcessPool):
+                    # the client always gets a response
+                    await _send_error(writer, x)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass    # the client went away
+        except asyncio.CancelledError:
+            pass    # the event loop is shutting down
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def _send_error(writer: asyncio.StreamWriter, error: Exception, last: bool = False) -> None:
+    # If it's the last response on the connection, the end of the stream is sent right after it. Closing the writer
+    # isn't enough for that: worker processes that were forked while the connection was open share its socket.
+    writer.write(json.dumps({"error": str(error) or type(error).__name__}).encode() + b"\n")
+    if last and writer.can_write_eof():
+        writer.write_eof()
+    await writer.drain()
+
+
+def _is_size(value: Any) -> bool:
+    # maze dimensions are positive ints (and bools are not dimensions, even though they are ints)
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def _too_large(max_cells: int) -> ValueError:
+    return ValueError("mazes can have at most {} cells".format(max_cells))
+
+
+def _costs_bytes(costs: Sequence[int]) -> bytes:
+    # the costs of the cells as 32 bits unsigned ints, little endian
+    costs = array("I", costs)
+    if sys.byteorder == "big":
+        costs.byteswap()
+    return costs.tobytes()
+
+
+def _costs_from_bytes(data: bytes) -> array:
+    costs = array("I", data)
+    if sys.byteorder == "big":
+        costs.byteswap()
+    return costs
+
+
+async def _send(writer: asyncio.StreamWriter, header: Dict[str, Any], data: Any, chunk_size: int) -> None:
+    # writes the header line and then the data in chunks, waiting for each to be taken by the connection
+    data = memoryview(data)
+    header["length"] = len(data)
+    writer.write(json.dumps(header).encode() + b"\n")
+    for offset in range(0, len(data), chunk_size):
+        writer.write(data[offset:offset + chunk_size])
+        await writer.drain()
+    await writer.drain()
+
+
+class MazeClient:
+    """
+    Client for a maze service that's made available with serve(), usually on the same machine.
+    Requests over the same client are sent one after another; use more clients for concurrent requests.
+    """
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "MazeClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self) -> None:
+        if self._writer:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = self._reader = None
+
+    async def generate(self, generator: str, columns: int, rows: int, seed: Optional[int] = None) -> Maze:
+        async with self._lock:
+            await self._request({"command": "generate", "generator": generator,
+                                 "columns": columns, "rows": rows, "seed": seed})
+            header, grid = await self._response()
+        maze = Maze(header["columns"], header["rows"], bytearray(grid))
+        maze.seed = header["seed"]
+        maze.generator = header["generator"]
+        return maze
+
+    async def solve(self, maze: Maze, solver: str = "bfs", start: Tuple[int, int] = (0, 0),
+                    goal: Optional[Tuple[int, int]] = None) -> Tuple[str, int]:
+        request = {"command": "solve", "solver": solver, "columns": maze.num_columns,
+                   "rows": maze.num_rows, "start": start, "goal": goal}
+        data = bytes(maze.grid)
+        if maze.costs is not None:
+            request["costs"] = True
+            data += _costs_bytes(maze.costs)
+        async with self._lock:
+            await self._request(request, data)
+            header, path = await self._response()
+        return path.decode(), header["iterations"]
+
+    async def _request(self, request: Dict[str, Any], data: bytes = b"") -> None:
+        if self._writer is None:
+            raise RuntimeError("the client isn't connected")
+        self._writer.write(json.dumps(request).encode() + b"\n")
+        self._writer.write(data)
+        await self._writer.drain()
+
+    async def _response(self) -> Tuple[Dict[str, Any], bytes]:
+        header = json.loads(await self._reader.readline())
+        if "error" in header:
+            raise ValueError(header["error"])
+        return header, await self._reader.readexactly(header["length"])
@@ -1,123 +1,573 @@
 from abc import ABC, abstractmethod
-from typing import Generator, Tuple, Mapping
+from array import array
+from collections import deque
+from heapq import heappush, heappop
+from typing import Generator, Tuple, Sequence, Optional, Any
 
-from mazes.maze import Maze, dxdy
+from mazes.maze import Maze, dxdy, door_strings, DOORS, opposite_direction_table
+from mazes.instrument import Instrument
+
+__all__ = ["BreadthFirstSolver", "DepthFirstSolver", "AStarSolver", "BidirectionalBFSSolver", "DijkstraSolver"]
 
 
 class MazeSolver(ABC):
+    # The solvers search a path from the start cell to the goal cell.
+    # The start defaults to (0, 0) in the top left,
+    # and the goal defaults to the lower right cell at (numcols-1, numrows-1).
+    # solve() returns the path and the number of iterations (cells expanded) it took.
+    instrument: Optional[Instrument] = None     # receives measurements of the solver's work, if it's set
+    weighted = False    # does the solver take the costs of a weighted maze into account
+
     @abstractmethod
-    def solve(self, maze) -> Tuple[str, int]:
+    def solve(self, maze, start: Tuple[int, int] = (0, 0),
+              goal: Optional[Tuple[int, int]] = None) -> Tuple[str, int]:
         pass
 
     @abstractmethod
-    def solve_generator(self, maze) -> Generator[str, None, None]:
+    def solve_generator(self, maze, start: Tuple[int, int] = (0, 0),
+                        goal: Optional[Tuple[int, int]] = None) -> Generator[str, None, None]:
         pass
 
-    def _walkback(self, previous_links: Mapping[Tuple[int, int], Tuple[int, int]], x: int, y: int) -> str:
-        # determines the solution path by 'walking back' to the start point (and reversing that path)
-        path = ""
+    def visit_generator(self, maze, start: Tuple[int, int] = (0, 0),
+                        goal: Optional[Tuple[int, int]] = None) -> Generator[Tuple[int, str], None, Optional[str]]:
+        # Yields (cell index, direction) for every cell the search visits, in the order it visits them:
+        # the direction of the step into the cell from the cell it was reached from, or an empty string
+        # for the cells the search starts from. Finally returns the solution path (None if there's no path).
+        # The solvers override this without producing paths along the way, so it's a lot cheaper
+        # than solve_generator(). This default follows the paths of solve_generator() to the cells instead.
+        start_index, goal_index = self._endpoints(maze, start, goal)
+        offsets = self._offsets(maze)
+        path = None
+        index = -1
+        for path in self.solve_generator(maze, start, goal):
+            index = start_index + sum(map(offsets.__getitem__, path))
+            yield index, path[-1:]
+        return path if index == goal_index else None
+
+    def _endpoints(self, maze: Maze, start: Tuple[int, int], goal: Optional[Tuple[int, int]]) -> Tuple[int, int]:
+        # the cell indexes of the start and goal cells
+        if goal is None:
+            goal = (maze.num_columns - 1, maze.num_rows - 1)
+        for x, y in (start, goal):
+            if not (0 <= x < maze.num_columns and 0 <= y < maze.num_rows):
+                raise ValueError("start and goal must be inside the maze")
+        return start[1] * maze.num_columns + start[0], goal[1] * maze.num_columns + goal[0]
+
+    def _walkback(self, previous_links: Sequence[int], columns: int, index: int) -> str:
+        # determines the solution path by 'walking back' to the start point (and reversing that path).
+        # previous_links contains the index of the path-previous cell for every cell index,
+        # the start cell links to itself.
+        path = []
         while True:
-            px, py = previous_links[(x, y)]
-            if py < y:
-                path += "s"
-            elif py > y:
-                path += "n"
-            elif px < x:
-                path += "e"
-            elif px > x:
-                path += "w"
+            previous = previous_links[index]
+            if previous == index - columns:
+                path.append("s")
+            elif previous == index + columns:
+                path.append("n")
+            elif previous == index - 1:
+                path.append("e")
+            elif previous == index + 1:
+                path.append("w")
             else:
-                return path[::-1]
-            x, y = px, py
+                return "".join(reversed(path))
+            index = previous
+
+    def _offsets(self, maze: Maze) -> dict:
+        # cell index offset to the neighbor cell in every direction
+        return {direction: dy * maze.num_columns + dx for direction, (dx, dy) in dxdy.items()}
+
+
+class _PathCache:
+    """
+    Produces the path strings of the cells visited by a search, without keeping a path string for every cell.
+    Only the path-previous links and the direction taken into every cell are stored.
+    The path of a visited cell is kept (shared by its children) until all its children have been visited
+    (or have been given another parent by the search, see leave()),
+    as long as these cached paths fit in max_size characters. When they don't,
+    the path is reconstructed by walking back to the nearest ancestor that still has its path cached.
+    """
+
+    def __init__(self, previous_links: Sequence[int], came_from: bytearray, start: int, max_size: int) -> None:
+        self.previous_links = previous_links
+        self.came_from = came_from
+        self.start = start
+        self.max_size = max_size
+        self.paths = {start: ""}
+        self.waiting = bytearray(len(came_from))  # for the cells in paths: number of children still to be visited
+        self.size = 0
+
+    def visit(self, index: int) -> str:
+        # returns the path to the cell. Must be called once for every visited cell.
+        paths = self.paths
+        previous = self.previous_links[index]
+        if index == self.start:
+            return ""
+        if previous in paths:
+            path = paths[previous] + chr(self.came_from[index])
+            self._release(previous)
+            return path
+        steps = bytearray()
+        ancestor = index
+        while ancestor not in paths:
+            steps.append(self.came_from[ancestor])
+            ancestor = self.previous_links[ancestor]
+        steps.reverse()
+        return paths[ancestor] + steps.decode()
+
+    def keep(self, index: int, path: str, children: int) -> None:
+        # remember the path of a visited cell for the given number of children that are yet to be visited
+        if children and self.size + len(path) <= self.max_size:
+            self.paths[index] = path
+            self.waiting[index] = children
+            self.size += len(path)
+
+    def leave(self, parent: int) -> None:
+        # a child of the cell got another parent (a shorter or cheaper path) before it was visited,
+        # so the cell has one child less to wait for
+        if parent in self.paths:
+            self._release(parent)
+
+    def _release(self, parent: int) -> None:
+        self.waiting[parent] -= 1
+        if not self.waiting[parent] and parent != self.start:
+            self.size -= len(self.paths.pop(parent))
 
 
 class BreadthFirstSolver(MazeSolver):
-    def solve(self, maze) -> Tuple[str, int]:
-        # assume start cell is at (0, 0) in the top left,
-        # and the exit cell is in the lower right at (numcols-1, numrows-1).
+    path_cache_size = 1 << 24   # max. number of path characters that solve_generator keeps in memory
+
+    def solve(self, maze, start: Tuple[int, int] = (0, 0),
+              goal: Optional[Tuple[int, int]] = None) -> Tuple[str, int]:
         # search strategy is breadth-first.
-        paths = [(0, 0)]
-        discovered = {(0, 0): (0, 0)}  # remembers its path-previous node as well
+        grid = maze.grid
+        offsets = self._offsets(maze)
+        start_index, goal_index = self._endpoints(maze, start, goal)
+        discovered = array("i", [-1]) * len(grid)  # remembers the path-previous cell index as well
+        discovered[start_index] = start_index
+        queue = deque([start_index])
         iterations = 0
-        while paths:
-            x, y = paths.pop(0)
-            if x == maze.num_columns - 1 and y == maze.num_rows - 1:
-                return self._walkback(discovered, x, y), iterations
-            doors = maze.cells[y][x].doors
-            # for direction in [d for d in "nesw" if d in doors]:
-            for direction in doors:
-                dx, dy = dxdy[direction]
-                new_x, new_y = x + dx, y + dy
-                if (new_x, new_y) not in discovered:
-                    paths.append((new_x, new_y))
-                    discovered[(new_x, new_y)] = (x, y)
+        instrument = self.instrument
+        path = ""
+        while queue:
+            if instrument:
+                instrument.peak("frontier", len(queue))
+            index = queue.popleft()
+            if index == goal_index:
+                path = self._walkback(discovered, maze.num_columns, index)
+                break
+            for direction in door_strings[grid[index] & DOORS]:
+                neighbor = index + offsets[direction]
+                if discovered[neighbor] < 0:
+                    queue.append(neighbor)
+                    discovered[neighbor] = index
             iterations += 1
-        return "", iterations
+        if instrument:
+            instrument.count("cells_visited", iterations)
+        return path, iterations
 
-    def solve_generator(self, maze) -> Generator[str, None, None]:
-        # Assume start cell is at (0, 0) in the top left,
-        # and the exit cell is in the lower right at (numcols-1, numrows-1).
+    def solve_generator(self, maze, start: Tuple[int, int] = (0, 0),
+                        goal: Optional[Tuple[int, int]] = None) -> Generator[str, None, None]:
         # The last path returned is the solution.
-        paths = [(0, 0, "")]
-        discovered = {(0, 0)}
-        while paths:
-            x, y, path = paths.pop(0)
-            maze.cells[y][x].tag = len(path)
-            if x == maze.num_columns - 1 and y == maze.num_rows - 1:
+        # The paths are produced by a _PathCache rather than storing a path string with every cell in the queue.
+        grid = maze.grid
+        offsets = self._offsets(maze)
+        start_index, goal_index = self._endpoints(maze, start, goal)
+        discovered = array("i", [-1]) * len(grid)  # remembers the path-previous cell index as well
+        discovered[start_index] = start_index
+        came_from = bytearray(len(grid))  # direction taken to get into the cell
+        paths = _PathCache(discovered, came_from, start_index, self.path_cache_size)
+        queue = deque([start_index])
+        while queue:
+            index = queue.popleft()
+            path = paths.visit(index)
+            maze.tags[index] = len(path)
+            if index == goal_index:
                 yield path
                 return
             yield path
-            doors = maze.cells[y][x].doors
-            # for direction in [d for d in "nesw" if d in doors]:
-            for direction in doors:
-                dx, dy = dxdy[direction]
-                new_x, new_y = x + dx, y + dy
-                if (new_x, new_y) not in discovered:
-                    paths.append((new_x, new_y, path + direction))
-                    discovered.add((new_x, new_y))
+            children = 0
+            for direction in door_strings[grid[index] & DOORS]:
+                neighbor = index + offsets[direction]
+                if discovered[neighbor] < 0:
+                    queue.append(neighbor)
+                    discovered[neighbor] = index
+                    came_from[neighbor] = ord(direction)
+                    children += 1
+            paths.keep(index, path, children)
+
+    def visit_generator(self, maze, start: Tuple[int, int] = (0, 0),
+                        goal: Optional[Tuple[int, int]] = None) -> Generator[Tuple[int, str], None, Optional[str]]:
+        grid = maze.grid
+        offsets = self._offsets(maze)
+        start_index, goal_index = self._endpoints(maze, start, goal)
+        discovered = array("i", [-1]) * len(grid)  # remembers the path-previous cell index as well
+        discovered[start_index] = start_index
+        came_from = bytearray(len(grid))  # direction taken to get into the cell
+        queue = deque([start_index])
+        while queue:
+            index = queue.popleft()
+            yield index, chr(came_from[index]) if came_from[index] else ""
+            if index == goal_index:
+                return self._walkback(discovered, maze.num_columns, index)
+            for direction in door_strings[grid[index] & DOORS]:
+                neighbor = index + offsets[direction]
+                if discovered[neighbor] < 0:
+                    queue.append(neighbor)
+                    discovered[neighbor] = index
+                    came_from[neighbor] = ord(direction)
+        return None
 
 
 class DepthFirstSolver(MazeSolver):
-    def solve(self, maze: Maze) -> Tuple[str, int]:
-        # assume start cell is at (0, 0) in the top left,
-        # and the exit cell is in the lower right at (numcols-1, numrows-1).
+    def solve(self, maze: Maze, start: Tuple[int, int] = (0, 0),
+              goal: Optional[Tuple[int, int]] = None) -> Tuple[str, int]:
         # search strategy is depth-first.
-        discovered = {(0, 0): (0, 0)}  # remembers its path-previous node as well
-        stack = [(0, 0)]
+        grid = maze.grid
+        offsets = self._offsets(maze)
+        start_index, goal_index = self._endpoints(maze, start, goal)
+        discovered = array("i", [-1]) * len(grid)  # remembers the path-previous cell index as well
+        discovered[start_index] = start_index
+        stack = [start_index]
         iterations = 0
+        instrument = self.instrument
+        path = ""
         while stack:
-            x, y = stack.pop()
-            if x == maze.num_columns - 1 and y == maze.num_rows - 1:
-                return self._walkback(discovered, x, y), iterations
-            doors = maze.cells[y][x].doors
-            for direction in [d for d in "nesw" if d in doors]:
-                dx, dy = dxdy[direction]
-                new_x, new_y = x + dx, y + dy
-                if (new_x, new_y) not in discovered:
-                    stack.append((new_x, new_y))
-                    discovered[(new_x, new_y)] = (x, y)
+            index = stack.pop()
+            if index == goal_index:
+                path = self._walkback(discovered, maze.num_columns, index)
+                break
+            for direction in door_strings[grid[index] & DOORS]:
+                neighbor = index + offsets[direction]
+                if discovered[neighbor] < 0:
+                    stack.append(neighbor)
+                    discovered[neighbor] = index
+            if instrument:
+                instrument.peak("stack", len(stack))
             iterations += 1
-        return "", iterations
-
-    def solve_generator(self, maze) -> Generator[str, None, None]:
-        # Assume start cell is at (0, 0) in the top left,
-        # and the exit cell is in the lower right at (numcols-1, numrows-1).
-        # Iteratively look until a solution is found while returning
-        # All the intermediate paths being followed. Because of this,
-        # it's not very useful to attempt to optimize out the intermediate path strings.
-        # The last path returned is the solution.
-        discovered = {(0, 0)}
-        stack = [(0, 0, "")]
+        if instrument:
+            instrument.count("cells_visited", iterations)
+            # the search had to backtrack from every expanded cell that didn't lead to any new cells
+            parents = {previous for index, previous in enumerate(discovered) if previous >= 0 and previous != index}
+            instrument.count("backtracks", iterations - len(parents))
+        return path, iterations
+
+    def solve_generator(self, maze, start: Tuple[int, int] = (0, 0), goal: Optional[Tuple[int, int]] = None,
+                        output: str = "paths") -> Generator[Any, None, None]:
+        # Yields the path to every cell the search visits. The last path returned is the solution.
+        # Only a single path is kept: a bytearray that is cut back and extended as the search backtracks
+        # and advances. The stack just holds (cell index, path length, direction into the cell) of the cells
+        # that are still to be visited, so memory stays in the order of the length of the path.
+        # What is yielded for every cell depends on output:
+        #   "paths":  the path as a new string
+        #   "shared": the path bytearray itself, it's changed in place when the search continues
+        #   "events": (steps, direction): the number of steps to remove from the end of the previous path,
+        #             and the direction to add to it (empty for the start cell)
+        if output not in ("paths", "shared", "events"):
+            raise ValueError("unknown output: " + output)
+        grid = maze.grid
+        offsets = self._offsets(maze)
+        start_index, goal_index = self._endpoints(maze, start, goal)
+        discovered = bytearray(len(grid))
+        discovered[start_index] = 1
+        path = bytearray()
+        stack = [(start_index, 0, 0)]
         while stack:
-            x, y, path = stack.pop()
-            if x == maze.num_columns - 1 and y == maze.num_rows - 1:
+            index, length, direction = stack.pop()
+            removed = 0
+            if direction:
+                removed = len(path) - length + 1
+                del path[length - 1:]
+                path.append(direction)
+            if output == "paths":
+                yield path.decode()
+            elif output == "shared":
                 yield path
+            else:
+                yield removed, chr(direction) if direction else ""
+            if index == goal_index:
                 return
-            yield path
-            doors = maze.cells[y][x].doors
-            for direction in [d for d in "nesw" if d in doors]:
-                dx, dy = dxdy[direction]
-                new_x, new_y = x + dx, y + dy
-                if (new_x, new_y) not in discovered:
-                    stack.append((new_x, new_y, path + direction))
-                    discovered.add((new_x, new_y))
+            for direction in door_strings[grid[index] & DOORS]:
+                neighbor = index + offsets[direction]
+                if not discovered[neighbor]:
+                    discovered[neighbor] = 1
+                    stack.append((neighbor, length + 1, ord(direction)))
+
+    def visit_generator(self, maze, start: Tuple[int, int] = (0, 0),
+                        goal: Optional[Tuple[int, int]] = None) -> Generator[Tuple[int, str], None, Optional[str]]:
+        grid = maze.grid
+        offsets = self._offsets(maze)
+        start_index, goal_index = self._endpoints(maze, start, goal)
+        discovered = array("i", [-1]) * len(grid)  # remembers the path-previous cell index as well
+        discovered[start_index] = start_index
+        came_from = bytearray(len(grid))  # direction taken to get into the cell
+        stack = [start_index]
+        while stack:
+            index = stack.pop()
+            yield index, chr(came_from[index]) if came_from[index] else ""
+            if index == goal_index:
+                return self._walkback(discovered, maze.num_columns, index)
+            for direction in door_strings[grid[index] & DOORS]:
+                neighbor = index + offsets[direction]
+                if discovered[neighbor] < 0:
+                    stack.append(neighbor)
+                    discovered[neighbor] = index
+                    came_from[neighbor] = ord(direction)
+        return None
+
+
+class _SearchSolver(MazeSolver):
+    # Solver that implements the search itself in _search(), which yields (cell index, direction, path)
+    # of every cell it visits and finally returns the solution path (or None if there's no path to the goal).
+    # The direction is the character code of the step into the cell, 0 for the cells the search starts from.
+
+    def solve(self, maze, start: Tuple[int, int] = (0, 0),
+              goal: Optional[Tuple[int, int]] = None) -> Tuple[str, int]:
+        search = self._search(maze, start, goal, False)
+        iterations = 0
+        try:
+            while True:
+                next(search)
+                iterations += 1
+        except StopIteration as result:
+            if self.instrument:
+                self.instrument.count("cells_visited", iterations)
+            return result.value or "", iterations
+
+    def solve_generator(self, maze, start: Tuple[int, int] = (0, 0),
+                        goal: Optional[Tuple[int, int]] = None) -> Generator[str, None, None]:
+        # The last path returned is the solution.
+        search = self._search(maze, start, goal, True)
+        try:
+            while True:
+                index, _, path = next(search)
+                maze.tags[index] = len(path)
+                yield path
+        except StopIteration as result:
+            if result.value is not None:
+                yield result.value
+
+    def visit_generator(self, maze, start: Tuple[int, int] = (0, 0),
+                        goal: Optional[Tuple[int, int]] = None) -> Generator[Tuple[int, str], None, Optional[str]]:
+        _, goal_index = self._endpoints(maze, start, goal)
+        search = self._search(maze, start, goal, False)
+        reached = False
+        try:
+            while True:
+                index, direction, _ = next(search)
+                reached = reached or index == goal_index
+                yield index, chr(direction) if direction else ""
+        except StopIteration as result:
+            solution = result.value
+        # the search returns as soon as it gets to the goal, without yielding that as a visited cell itself
+        if solution is not None and not reached:
+            yield goal_index, solution[-1:]
+        return solution
+
+    @abstractmethod
+    def _search(self, maze: Maze, start: Tuple[int, int], goal: Optional[Tuple[int, int]],
+                all_paths: bool) -> Generator[Tuple[int, int, str], None, Optional[str]]:
+        # the paths to the visited cells only have to be produced when all_paths is true.
+        pass
+
+
+class AStarSolver(_SearchSolver):
+    """
+    A* search, using the Manhattan distance to the goal as heuristic.
+    The open cells are kept in a binary heap of (estimated path length, cell index),
+    combined into plain ints which compare a lot faster than tuples.
+    Usually expands far fewer cells than the blind breadth-first or depth-first searches,
+    but it still has to explore every dead end that leads towards the goal.
+    """
+    path_cache_size = 1 << 24   # max. number of path characters that solve_generator keeps in memory
+
+    def _search(self, maze: Maze, start: Tuple[int, int], goal: Optional[Tuple[int, int]],
+                all_paths: bool) -> Generator[Tuple[int, int, str], None, Optional[str]]:
+        grid = maze.grid
+        columns = maze.num_columns
+        offsets = self._offsets(maze)
+        start_index, goal_index = self._endpoints(maze, start, goal)
+        goal_y, goal_x = divmod(goal_index, columns)
+        distances = array("i", [-1]) * len(grid)   # distance from the start of the cells discovered so far
+        distances[start_index] = 0
+        discovered = array("i", [-1]) * len(grid)  # remembers the path-previous cell index as well
+        discovered[start_index] = start_index
+        came_from = bytearray(len(grid))  # direction taken to get into the cell
+        paths = _PathCache(discovered, came_from, start_index, self.path_cache_size)
+        expanded = bytearray(len(grid))
+        shift = len(grid).bit_length()     # heap entries are (estimated length << shift) | cell index
+        mask = (1 << shift) - 1
+        heap = [start_index]
+        path = ""
+        instrument = self.instrument
+        while heap:
+            if instrument:
+                instrument.peak("frontier", len(heap))
+            index = heappop(heap) & mask
+            if expanded[index]:
+                if instrument:
+                    instrument.count("stale_entries")
+                continue    # this cell was already reached via a shorter path
+            expanded[index] = 1
+            if index == goal_index:
+                return self._walkback(discovered, columns, index)
+            if all_paths:
+                path = paths.visit(index)
+            yield index, came_from[index], path
+            distance = distances[index] + 1
+            children = 0
+            for direction in door_strings[grid[index] & DOORS]:
+                neighbor = index + offsets[direction]
+                if not expanded[neighbor] and (distances[neighbor] < 0 or distance < distances[neighbor]):
+                    if all_paths and distances[neighbor] >= 0:
+                        paths.leave(discovered[neighbor])
+                    distances[neighbor] = distance
+                    discovered[neighbor] = index
+                    came_from[neighbor] = ord(direction)
+                    y, x = divmod(neighbor, columns)
+                    heappush(heap, (distance + abs(x - goal_x) + abs(y - goal_y)) << shift | neighbor)
+                    children += 1
+            if all_paths:
+                paths.keep(index, path, children)
+        return None
+
+
+class BidirectionalBFSSolver(_SearchSolver):
+    """
+    Breadth-first search from the start and from the goal at the same time,
+    every time expanding a full level of the side with the smallest queue.
+    Stops when both searches meet, which means that each of them only has to
+    search about half of the distance.
+    The paths to the cells visited by the search from the goal are paths from the goal.
+    """
+    path_cache_size = 1 << 23   # max. number of path characters per side that solve_generator keeps in memory
+
+    def _search(self, maze: Maze, start: Tuple[int, int], goal: Optional[Tuple[int, int]],
+                all_paths: bool) -> Generator[Tuple[int, int, str], None, Optional[str]]:
+        grid = maze.grid
+        columns = maze.num_columns
+        offsets = self._offsets(maze)
+        start_index, goal_index = self._endpoints(maze, start, goal)
+        if start_index == goal_index:
+            return ""
+        # index 0 of these is the search from the start, index 1 the search from the goal
+        discovered = []     # remembers the path-previous cell index as well
+        distances = []
+        came_from = []
+        paths = []
+        queues = []
+        for origin in start_index, goal_index:
+            discovered.append(array("i", [-1]) * len(grid))
+            discovered[-1][origin] = origin
+            distances.append(array("i", [-1]) * len(grid))
+            distances[-1][origin] = 0
+            came_from.append(bytearray(len(grid)))
+            paths.append(_PathCache(discovered[-1], came_from[-1], origin, self.path_cache_size))
+            queues.append(deque([origin]))
+        path = ""
+        instrument = self.instrument
+        while queues[0] and queues[1]:
+            side = 0 if len(queues[0]) <= len(queues[1]) else 1
+            queue = queues[side]
+            if instrument:
+                instrument.peak("frontier", len(queues[0]) + len(queues[1]))
+                instrument.count("levels")
+            side_discovered = discovered[side]
+            side_distances = distances[side]
+            side_came_from = came_from[side]
+            other_distances = distances[1 - side]
+            meeting: Optional[Tuple[int, int, int, str]] = None
+            for _ in range(len(queue)):
+                index = queue.popleft()
+                if all_paths:
+                    path = paths[side].visit(index)
+                yield index, side_came_from[index], path
+                children = 0
+                for direction in door_strings[grid[index] & DOORS]:
+                    neighbor = index + offsets[direction]
+                    if other_distances[neighbor] >= 0:
+                        length = side_distances[index] + 1 + other_distances[neighbor]
+                        if meeting is None or length < meeting[0]:
+                            meeting = (length, index, neighbor, direction)
+                    if side_discovered[neighbor] < 0:
+                        queue.append(neighbor)
+                        side_discovered[neighbor] = index
+                        side_distances[neighbor] = side_distances[index] + 1
+                        side_came_from[neighbor] = ord(direction)
+                        children += 1
+                if all_paths:
+                    paths[side].keep(index, path, children)
+            if meeting:
+                # the path from the start to one side of the meeting point, and the reversed path from the goal
+                # to its other side, where the two searches are connected
+                _, index, neighbor, direction = meeting
+                if side == 1:
+                    index, neighbor, direction = neighbor, index, direction.translate(opposite_direction_table)
+                to_index = self._walkback(discovered[0], columns, index)
+                to_neighbor = self._walkback(discovered[1], columns, neighbor)
+                return to_index + direction + to_neighbor[::-1].translate(opposite_direction_table)
+        return None
+
+
+class DijkstraSolver(_SearchSolver):
+    """
+    Dijkstra's shortest path search, for weighted mazes: finds the path with the lowest total cost,
+    where moving into a cell costs maze.costs[cell] (maze.path_cost() gives the total).
+    Unweighted mazes cost 1 per move, so then it finds the shortest path just like a breadth-first search.
+    The open cells are kept in a binary heap of plain ints that combine the cost and the cell index,
+    which compare a lot faster than tuples. Instead of updating the cost of a cell that's already
+    in the heap (decrease-key), the cell is just pushed again and the stale entry is skipped later.
+    """
+    path_cache_size = 1 << 24   # max. number of path characters that solve_generator keeps in memory
+    weighted = True
+
+    def _search(self, maze: Maze, start: Tuple[int, int], goal: Optional[Tuple[int, int]],
+                all_paths: bool) -> Generator[Tuple[int, int, str], None, Optional[str]]:
+        grid = maze.grid
+        columns = maze.num_columns
+        costs = maze.costs if maze.costs is not None else array("H", [1]) * len(grid)
+        offsets = self._offsets(maze)
+        start_index, goal_index = self._endpoints(maze, start, goal)
+        shift = len(grid).bit_length()     # heap entries are (cost << shift) | cell index
+        mask = (1 << shift) - 1
+        distances = array("q", [-1]) * len(grid)    # lowest cost found so far to get into the cell
+        distances[start_index] = 0
+        discovered = array("i", [-1]) * len(grid)  # remembers the path-previous cell index as well
+        discovered[start_index] = start_index
+        came_from = bytearray(len(grid))  # direction taken to get into the cell
+        paths = _PathCache(discovered, came_from, start_index, self.path_cache_size)
+        settled = bytearray(len(grid))
+        heap = [start_index]
+        path = ""
+        instrument = self.instrument
+        while heap:
+            if instrument:
+                instrument.peak("frontier", len(heap))
+            index = heappop(heap) & mask
+            if settled[index]:
+                if instrument:
+                    instrument.count("stale_entries")
+                continue    # this cell was already reached with a lower cost
+            settled[index] = 1
+            if index == goal_index:
+                return self._walkback(discovered, columns, index)
+            if all_paths:
+                path = paths.visit(index)
+            yield index, came_from[index], path
+            distance = distances[index]
+            children = 0
+            for direction in door_strings[grid[index] & DOORS]:
+                neighbor = index + offsets[direction]
+                if settled[neighbor]:
+                    continue
+                cost = distance + costs[neighbor]
+                if distances[neighbor] < 0 or cost < distances[neighbor]:
+                    if all_paths and distances[neighbor] >= 0:
+                        paths.leave(discovered[neighbor])
+                    distances[neighbor] = cost
+                    discovered[neighbor] = index
+                    came_from[neighbor] = ord(direction)
+                    heappush(heap, cost << shift | neighbor)
+                    children += 1
+            if all_paths:
+                paths.keep(index, path, children)
+        return None
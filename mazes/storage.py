@@ -0,0 +1,147 @@
+import mmap
+import struct
+from typing import Optional, Iterator, Union
+
+from .maze import Maze, DOORS, VISITED
+
+__all__ = ["save_maze", "load_maze", "PackedGrid"]
+
+
+# Binary maze file format (all numbers little endian):
+#   header:   magic "MAZE", version (u8), compression (u8), flags (u8), padding (1 byte),
+#             columns (u32), rows (u32), seed (i64), length of the generator name (u16)
+#   followed by the generator name (utf-8),
+#   followed by the door masks of all cells, packed in 4 bits per cell: two cells per byte, first cell in the low bits.
+#   This cell data can be compressed as a whole with zlib or lzma.
+# The visited bits of the cells are not stored: all cells of a loaded maze are open.
+
+MAGIC = b"MAZE"
+VERSION = 1
+_header = struct.Struct("<4sBBBxIIqH")
+_FLAG_SEED = 1
+_compressions = {None: 0, "zlib": 1, "lzma": 2}
+_chunk_size = 1 << 20   # number of cells that are (un)packed at once, must be even
+
+_doors_only = bytes(cell & DOORS for cell in range(256))
+_high_nibble = bytes((cell << 4) & 255 for cell in range(256))
+_unpack_low = bytes(byte & 15 | VISITED for byte in range(256))
+_unpack_high = bytes(byte >> 4 | VISITED for byte in range(256))
+
+
+def save_maze(maze: Maze, path: str, compression: Optional[str] = None) -> None:
+    # compression can be None, "zlib" or "lzma"
+    if compression not in _compressions:
+        raise ValueError("unknown compression: " + str(compression))
+    if maze.seed is not None and not -1 << 63 <= maze.seed < 1 << 63:
+        raise ValueError("the seed doesn't fit in a maze file, it must be a 64 bits signed integer")
+    name = (maze.generator or "").encode()
+    flags = _FLAG_SEED if maze.seed is not None else 0
+    with open(path, "wb") as file:
+        file.write(_header.pack(MAGIC, VERSION, _compressions[compression], flags,
+                                maze.num_columns, maze.num_rows, maze.seed or 0, len(name)))
+        file.write(name)
+        if compression == "zlib":
+            import zlib
+            compressor = zlib.compressobj(9)
+        elif compression == "lzma":
+            import lzma
+            compressor = lzma.LZMACompressor()
+        else:
+            compressor = None
+        for start in range(0, len(maze.grid), _chunk_size):
+            packed = _pack(maze.grid[start:start + _chunk_size])
+            file.write(compressor.compress(packed) if compressor else packed)
+        if compressor:
+            file.write(compressor.flush())
+
+
+def load_maze(path: str, mapped: bool = False) -> Maze:
+    # When mapped is true and the file isn't compressed, the file is memory mapped and the cells
+    # are only read when they're accessed (the maze's grid is then a read-only PackedGrid).
+    # Otherwise the whole maze is unpacked into memory.
+    with open(path, "rb") as file:
+        header = file.read(_header.size)
+        if len(header) < _header.size:
+            raise ValueError("not a maze file")
+        magic, version, compression, flags, columns, rows, seed, name_length = _header.unpack(header)
+        if magic != MAGIC:
+            raise ValueError("not a maze file")
+        if version != VERSION:
+            raise ValueError("unsupported maze file version: " + str(version))
+        name = file.read(name_length).decode()
+        cells = columns * rows
+        grid: Union[bytearray, PackedGrid]
+        if compression == 0 and mapped:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            grid = PackedGrid(mapping, _header.size + name_length, cells)
+        else:
+            grid = bytearray(cells)
+            if compression == 0:
+                data = file.read()
+            elif compression == 1:
+                import zlib
+                data = zlib.decompress(file.read())
+            elif compression == 2:
+                import lzma
+                data = lzma.decompress(file.read())
+            else:
+                raise ValueError("unknown compression in maze file")
+            if len(data) != (cells + 1) // 2:
+                raise ValueError("maze file is truncated")
+            grid[0::2] = data.translate(_unpack_low)
+            grid[1::2] = data[:cells // 2].translate(_unpack_high)
+    maze = Maze(columns, rows, grid)
+    maze.seed = seed if flags & _FLAG_SEED else None
+    maze.generator = name or None
+    return maze
+
+
+class PackedGrid:
+    """
+    Read-only grid of a maze that unpacks the cells straight from the packed data in the maze file,
+    only when they're accessed. It can be used in place of the bytearray grid of a Maze.
+    This allows random access into mazes that are far too large to load completely.
+    """
+
+    def __init__(self, data: Union[mmap.mmap, bytes], offset: int, length: int) -> None:
+        if len(data) - offset < (length + 1) // 2:
+            raise ValueError("maze file is truncated")
+        self.data = data
+        self.offset = offset
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[int, bytes]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step != 1:
+                raise ValueError("slices with a step are not supported")
+            if start >= stop:
+                return b""
+            first = self.offset + start // 2
+            data = self.data[first:self.offset + (stop + 1) // 2]
+            cells = bytearray(len(data) * 2)
+            cells[0::2] = data.translate(_unpack_low)
+            cells[1::2] = data.translate(_unpack_high)
+            skip = start & 1
+            return bytes(cells[skip:skip + stop - start])
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("grid index out of range")
+        byte = self.data[self.offset + index // 2]
+        return (byte >> 4 if index & 1 else byte & 15) | VISITED
+
+    def __iter__(self) -> Iterator[int]:
+        for start in range(0, self.length, _chunk_size):
+            yield from self[start:start + _chunk_size]
+
+
+def _pack(cells: Union[bytes, bytearray]) -> bytes:
+    # packs the door masks of the cells in 4 bits each, two cells per byte
+    doors = bytes(cells).translate(_doors_only)
+    low = doors[0::2]
+    high = doors[1::2].translate(_high_nibble)
+    return (int.from_bytes(low, "little") | int.from_bytes(high, "little")).to_bytes(len(low), "little")
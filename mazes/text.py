@@ -0,0 +1,51 @@
+from typing import Iterable, Iterator, TextIO
+
+from .maze import Maze, N, E, VISITED
+
+__all__ = ["ascii_lines", "write_ascii", "maze_rows"]
+
+
+# Streaming text rendering of mazes: every row of cells is turned into its two lines of text
+# (the wall above the row, and the row itself) as soon as it's available. Combined with a generator's
+# generate_rows() this needs memory for just a single row, so it can write mazes of any height.
+
+
+def maze_rows(maze: Maze) -> Iterator[bytes]:
+    # the rows of cells of a maze, one after another
+    for offset in range(0, maze.num_rows * maze.num_columns, maze.num_columns):
+        yield bytes(maze.grid[offset:offset + maze.num_columns])
+
+
+def ascii_lines(rows: Iterable[bytes], columns: int, wall: str = '#', space: str = ' ') -> Iterator[str]:
+    # Renders rows of cells (door masks) into lines of text, in the same way as text_maze.ascii_maze_with_path.
+    # The lines are rendered with single byte placeholders for the wall and space characters,
+    # which are only replaced if they're something else.
+    wall_byte, space_byte = 0, 1
+    placeholders = {wall_byte: wall, space_byte: space}
+    if len(wall.encode()) == 1 and len(space.encode()) == 1:
+        wall_byte, space_byte = wall.encode()[0], space.encode()[0]
+        placeholders = {}
+    north = bytes(space_byte if cell & N else wall_byte for cell in range(256))
+    east = bytes(space_byte if cell & E else wall_byte for cell in range(256))
+    visited = bytes(space_byte if cell & VISITED else wall_byte for cell in range(256))
+    wall_line = bytes([wall_byte]) * (columns * 2 + 1)
+    for row in rows:
+        top = bytearray(wall_line)
+        top[1::2] = row.translate(north)
+        middle = bytearray(wall_line)
+        middle[1::2] = row.translate(visited)
+        middle[2::2] = row.translate(east)
+        # the south and west don't have to be drawn because the neighbor cells already takes care of these
+        for line in top, middle:
+            if placeholders:
+                yield line.decode("latin-1").translate(placeholders)
+            else:
+                yield line.decode()
+    yield wall_line.decode("latin-1").translate(placeholders) if placeholders else wall_line.decode()
+
+
+def write_ascii(rows: Iterable[bytes], columns: int, file: TextIO, wall: str = '#', space: str = ' ') -> None:
+    # Writes the text rendering of the rows of cells straight into the file, line by line.
+    for line in ascii_lines(rows, columns, wall, space):
+        file.write(line)
+        file.write("\n")
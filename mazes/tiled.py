@@ -0,0 +1,145 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Type, Optional, Union, Iterator, List, Tuple, Generator
+
+from .maze import Maze, N, E, S, W
+from .generators import MazeGenerator, DepthFirstGenerator, CarveEvent
+from .instrument import Instrument
+
+__all__ = ["TiledGenerator"]
+
+
+# x, y, width, height and seed of a tile
+Tile = Tuple[int, int, int, int, int]
+
+
+class TiledGenerator(MazeGenerator):
+    """
+    Generates a single huge maze on multiple cores: the maze is split into tiles that are generated
+    by a pool of worker processes, each tile with an ordinary generator. The workers write their tiles
+    straight into a block of shared memory. The tiles are then stitched together with a single door
+    between every two tiles that are connected in a random spanning tree over the tiles
+    (which is just a small maze itself), so the result is still a perfect maze.
+    The tile borders can be noticed as long walls with a single door in them.
+    """
+
+    suggested_iteration_size = 200
+
+    def __init__(self, columns: int, rows: int, seed: Union[None, int, random.Random] = None,
+                 tile_generator: Type[MazeGenerator] = DepthFirstGenerator, tile_size: int = 500,
+                 workers: Optional[int] = None) -> None:
+        super().__init__(columns, rows, seed)
+        if tile_size < 1:
+            raise ValueError("tile size must be at least 1")
+        self.tile_generator = tile_generator
+        self.tile_size = tile_size
+        self.workers = workers
+        self.maze = self._new_maze()
+        # The layout of the tiles and their seeds are decided up front with our own random generator,
+        # so the maze doesn't depend on the number of workers or the order in which the tiles are done.
+        self._layout = DepthFirstGenerator(-(-columns // tile_size), -(-rows // tile_size), self.random).generate()
+        self._tiles: List[Tile] = [(x, y, min(tile_size, columns - x), min(tile_size, rows - y),
+                                    self.random.getrandbits(63))
+                                   for y in range(0, rows, tile_size) for x in range(0, columns, tile_size)]
+
+    def generate(self) -> Maze:
+        instrument = self.instrument or Instrument()
+        with instrument.phase("tiles"):
+            for _ in self._merge_tiles():
+                instrument.count("tiles")
+        with instrument.phase("stitch"):
+            self._stitch()
+        return self.maze
+
+    def generate_iterative(self) -> Generator[Maze, None, None]:
+        # yields the maze after every tile that has been merged into it, and after the tiles are stitched together
+        yield self.maze
+        for tile, cells in self._merge_tiles():
+            if cells is not self.maze.grid:
+                _copy_tile(cells, self.maze.grid, self.columns, tile)
+            yield self.maze
+        self._stitch()
+        yield self.maze
+
+    def generate_events(self, chunk_size: Optional[int] = None) -> Iterator[Union[CarveEvent, List[CarveEvent]]]:
+        # the events of a tile are the N and E doors of its cells, they're carved when the tile is merged
+        def events() -> Iterator[CarveEvent]:
+            for (x, y, width, height, _), cells in self._merge_tiles():
+                for row in range(y, y + height):
+                    offset = row * self.columns + x
+                    yield from self._door_events(bytes(cells[offset:offset + width]), x, row)
+            yield from self._stitch()
+        return self._chunk_events(events(), chunk_size)
+
+    def _merge_tiles(self) -> Iterator[Tuple[Tile, Union[bytearray, memoryview]]]:
+        # Generates the tiles into the maze. Yields every tile as soon as it's done, with the buffer that has its cells
+        # (laid out like the maze's grid). With worker processes that's the shared memory they write the tiles into,
+        # it's copied into the maze's grid in one go when all tiles are done.
+        grid = self.maze.grid
+        workers = self.workers or os.cpu_count() or 1
+        if workers == 1 or len(self._tiles) == 1:
+            for tile in self._tiles:
+                _write_tile(grid, self.columns, self.tile_generator, tile)
+                yield tile, grid
+            return
+        memory = shared_memory.SharedMemory(create=True, size=len(grid))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_generate_tile, (self.tile_generator, memory.name, self.columns, tile)): tile
+                           for tile in self._tiles}
+                for future in as_completed(futures):
+                    future.result()
+                    yield futures[future], memory.buf
+            grid[:] = memory.buf[:len(grid)]
+        finally:
+            memory.close()
+            memory.unlink()
+
+    def _stitch(self) -> List[CarveEvent]:
+        # carves a door at a random spot on the border of every two tiles that are connected in the layout
+        grid = self.maze.grid
+        columns = self.columns
+        size = self.tile_size
+        events = []
+        for tile_index, doors in enumerate(self._layout.grid):
+            tile_y, tile_x = divmod(tile_index, self._layout.num_columns)
+            left, top = tile_x * size, tile_y * size
+            if doors & N:
+                x = left + self.random.randrange(min(size, columns - left))
+                grid[top * columns + x] |= N
+                grid[(top - 1) * columns + x] |= S
+                events.append((x, top, "n"))
+            if doors & E:
+                x = left + size - 1
+                y = top + self.random.randrange(min(size, self.rows - top))
+                grid[y * columns + x] |= E
+                grid[y * columns + x + 1] |= W
+                events.append((x, y, "e"))
+        return events
+
+
+def _write_tile(buffer: Union[bytearray, memoryview], columns: int,
+                generator_class: Type[MazeGenerator], tile: Tile) -> None:
+    x, y, width, height, seed = tile
+    grid = generator_class(width, height, seed).generate().grid
+    for row in range(height):
+        offset = (y + row) * columns + x
+        buffer[offset:offset + width] = grid[row * width:(row + 1) * width]
+
+
+def _copy_tile(source: memoryview, destination: bytearray, columns: int, tile: Tile) -> None:
+    x, y, width, height, _ = tile
+    for offset in range(y * columns + x, (y + height) * columns, columns):
+        destination[offset:offset + width] = source[offset:offset + width]
+
+
+def _generate_tile(task: tuple) -> None:
+    # runs in a worker process, writes the tile into the shared memory of the maze
+    generator_class, name, columns, tile = task
+    memory = shared_memory.SharedMemory(name)
+    try:
+        _write_tile(memory.buf, columns, generator_class, tile)
+    finally:
+        memory.close()
@@ -0,0 +1,21 @@
+from mazes.batch import solve_many
+from mazes.generators import DepthFirstGenerator
+from mazes.solvers import DijkstraSolver
+
+
+def weighted_mazes(count):
+    mazes = []
+    for seed in range(count):
+        generator = DepthFirstGenerator(30, 20, seed)
+        generator.generate()
+        generator.braid(0.7)
+        generator.generate_costs(1, 9, 4)
+        mazes.append(generator.maze)
+    return mazes
+
+
+def test_weighted_mazes():
+    # the costs of the mazes go to the workers too
+    mazes = weighted_mazes(4)
+    for workers in [1, 2]:
+        assert solve_many(DijkstraSolver, mazes, workers=workers) == [DijkstraSolver().solve(maze) for maze in mazes]
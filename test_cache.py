@@ -0,0 +1,71 @@
+from array import array
+
+from mazes.cache import CachedSolver
+from mazes.generators import DepthFirstGenerator
+from mazes.maze import DOORS
+from mazes.solvers import BreadthFirstSolver, AStarSolver
+
+
+class CountingSolver(BreadthFirstSolver):
+    def __init__(self) -> None:
+        self.solves = 0
+
+    def solve(self, maze, start=(0, 0), goal=None):
+        self.solves += 1
+        return super().solve(maze, start, goal)
+
+
+def test_keys():
+    maze = DepthFirstGenerator(30, 20, seed=1).generate()
+    cache = CachedSolver(BreadthFirstSolver())
+    key = cache.key(maze)
+    assert key == cache.key(maze, (0, 0), (29, 19))
+    assert len({key, cache.key(maze, (1, 0)), cache.key(maze, goal=(5, 5)),
+                CachedSolver(AStarSolver()).key(maze)}) == 4
+    # only the doors count, not the visited bits or the tags
+    copy = DepthFirstGenerator(30, 20, seed=1).generate()
+    copy.grid = copy.grid.translate(bytes(cell & DOORS for cell in range(256)))
+    copy.tags[5] = "x"
+    assert cache.key(copy) == key
+    assert cache.key(DepthFirstGenerator(30, 20, seed=2).generate()) != key
+    # and the costs of a weighted maze
+    copy.costs = array("H", [1]) * len(copy.grid)
+    assert cache.key(copy) != key
+
+
+def test_lookups_and_eviction():
+    mazes = [DepthFirstGenerator(30, 20, seed=seed).generate() for seed in range(3)]
+    solver = CountingSolver()
+    solutions = [BreadthFirstSolver().solve(maze) for maze in mazes]
+    # room for the solutions of any two of the mazes (every solution takes a bit more than the length of its path)
+    cache = CachedSolver(solver, max_size=sum(sorted(len(path) for path, _ in solutions)[1:]) + 450)
+    assert [cache.solve(maze) for maze in mazes[:2]] == solutions[:2]
+    assert cache.solve(mazes[0]) == solutions[0]
+    assert (solver.solves, cache.hits, cache.misses) == (2, 1, 2)
+    # the third maze pushes out the least recently used one, which is the second maze now
+    cache.solve(mazes[2])
+    cache.solve(mazes[0])
+    assert solver.solves == 3
+    cache.solve(mazes[1])
+    assert solver.solves == 4
+    assert cache.size <= cache.max_size
+    cache.clear()
+    assert cache.size == 0
+    cache.solve(mazes[0])
+    assert solver.solves == 5
+
+
+def test_directory(tmp_path):
+    maze = DepthFirstGenerator(30, 20, seed=1).generate()
+    directory = str(tmp_path / "solutions")
+    solver = CountingSolver()
+    solution = CachedSolver(solver, directory=directory).solve(maze, goal=(10, 10))
+    # another cache (in another run) finds the stored solution
+    cache = CachedSolver(solver, directory=directory)
+    assert cache.solve(maze, goal=(10, 10)) == solution == BreadthFirstSolver().solve(maze, goal=(10, 10))
+    assert solver.solves == 1 and cache.hits == 1
+    # a damaged file is just solved again
+    for file in (tmp_path / "solutions").iterdir():
+        file.write_text("garbage")
+    assert CachedSolver(solver, directory=directory).solve(maze, goal=(10, 10)) == solution
+    assert solver.solves == 2
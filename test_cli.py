@@ -0,0 +1,22 @@
+from mazes.cli import main
+from mazes.generators import KruskalGenerator
+from mazes.text import ascii_lines, maze_rows
+
+
+def test_generate_and_solve(tmp_path, capsys):
+    path = str(tmp_path / "maze.bin")
+    assert main(["generate", "12", "8", "--generator", "kruskal", "--seed", "3", "--output", path]) == 0
+    assert main(["render", path]) == 0
+    maze = KruskalGenerator(12, 8, seed=3).generate()
+    assert capsys.readouterr().out.splitlines() == list(ascii_lines(maze_rows(maze), 12))
+    assert main(["solve", path, "--solver", "astar", "--goal", "4", "4"]) == 0
+    path = capsys.readouterr().out.strip()
+    assert path and all(step in "nesw" for step in path)
+
+
+def test_bad_sizes(capsys):
+    for columns, rows in [("0", "5"), ("5", "0"), ("-3", "4")]:
+        assert main(["generate", columns, rows]) == 1
+        assert capsys.readouterr().err.startswith("error: ")
+    assert main(["bench", "--size", "0"]) == 1
+    assert "error: " in capsys.readouterr().err
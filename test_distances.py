@@ -0,0 +1,51 @@
+import pytest
+
+from mazes.distances import distance_field
+from mazes.generators import DepthFirstGenerator
+from mazes.maze import Maze
+from mazes.solvers import BreadthFirstSolver
+
+
+def test_distances():
+    generator = DepthFirstGenerator(30, 20, seed=6)
+    maze = generator.generate()
+    generator.braid(0.5)
+    field = distance_field(maze, [(4, 7)])
+    assert field.typecode == "i" and len(field) == 600
+    for x, y in [(4, 7), (0, 0), (29, 19), (13, 2)]:
+        assert field[y * 30 + x] == len(BreadthFirstSolver().solve(maze, (4, 7), (x, y))[0])
+    # with more sources, every cell gets the distance to the nearest of them
+    other = distance_field(maze, [(25, 15)])
+    both = distance_field(maze, [(4, 7), (25, 15), (4, 7)])
+    assert list(both) == [min(a, b) for a, b in zip(field, other)]
+
+
+def test_targets():
+    maze = DepthFirstGenerator(30, 20, seed=6).generate()
+    field = distance_field(maze, [(0, 0)])
+    for targets in [[(3, 3)], [(29, 19), (3, 3)], [(0, 0), (10, 10)]]:
+        partial = distance_field(maze, [(0, 0)], targets)
+        farthest = max(field[y * 30 + x] for x, y in targets)
+        # the targets have their distance, and the flood stopped at that distance
+        assert all(partial[y * 30 + x] == field[y * 30 + x] for x, y in targets)
+        assert all(distance in (-1, expected) for distance, expected in zip(partial, field))
+        assert all(distance >= 0 for distance, expected in zip(partial, field) if expected < farthest)
+        assert max(partial) == farthest
+    # targets that are sources themselves are already done
+    assert sorted(distance_field(maze, [(0, 0)], [(0, 0)]))[-2:] == [-1, 0]
+    # no targets is the same as not giving any
+    assert distance_field(maze, [(0, 0)], []) == field
+    assert distance_field(maze, [(0, 0)], iter([])) == field
+
+
+def test_unreachable_and_outside():
+    maze = Maze(3, 2)
+    maze.carve(0, 0, "e")
+    field = distance_field(maze, [(0, 0)])
+    assert list(field) == [0, 1, -1, -1, -1, -1]
+    # an unreachable target doesn't stop the flood
+    assert distance_field(maze, [(0, 0)], [(2, 1)]) == field
+    with pytest.raises(ValueError):
+        distance_field(maze, [(3, 0)])
+    with pytest.raises(ValueError):
+        distance_field(maze, [(0, 0)], [(0, -1)])
@@ -0,0 +1,168 @@
+import random
+
+from mazes.distances import distance_field
+from mazes.generators import (DepthFirstGenerator, HuntAndKillGenerator, KruskalGenerator, WilsonGenerator,
+                              BinaryTreeGenerator, SidewinderGenerator, EllerGenerator)
+from mazes.maze import Maze, N, E, S, W, DOORS, VISITED
+from mazes.tiled import TiledGenerator
+
+all_generators = [DepthFirstGenerator, HuntAndKillGenerator, KruskalGenerator, WilsonGenerator,
+                  BinaryTreeGenerator, SidewinderGenerator, EllerGenerator]
+
+
+def assert_perfect(maze: Maze) -> None:
+    # A perfect maze is a spanning tree of its cells: they're all connected, by exactly one door less than
+    # there are cells. Every door must also be open from both sides, and none may lead out of the maze.
+    grid = maze.grid
+    columns, rows = maze.num_columns, maze.num_rows
+    doors = 0
+    for index, cell in enumerate(grid):
+        y, x = divmod(index, columns)
+        assert not (y == 0 and cell & N or y == rows - 1 and cell & S)
+        assert not (x == 0 and cell & W or x == columns - 1 and cell & E)
+        if cell & E:
+            assert grid[index + 1] & W
+            doors += 1
+        if cell & S:
+            assert grid[index + columns] & N
+            doors += 1
+        assert not (cell & W and not grid[index - 1] & E)
+        assert not (cell & N and not grid[index - columns] & S)
+    assert doors == len(grid) - 1
+    assert -1 not in distance_field(maze, [(0, 0)])
+
+
+def doors(maze: Maze) -> bytes:
+    return bytes(cell & DOORS for cell in maze.grid)
+
+
+def replay_events(generator_class, columns, rows, seed, chunk_size=None) -> bytes:
+    # the doors of the maze that is built from the generator's carve events
+    maze = Maze(columns, rows)
+    for events in generator_class(columns, rows, seed).generate_events(chunk_size):
+        for x, y, direction in events if chunk_size else [events]:
+            maze.carve(x, y, direction)
+    return doors(maze)
+
+
+def test_row_generators():
+    for generator_class in [BinaryTreeGenerator, SidewinderGenerator, EllerGenerator]:
+        for columns, rows in [(1, 1), (1, 9), (9, 1), (2, 2), (40, 25)]:
+            for seed in range(5):
+                maze = generator_class(columns, rows, seed).generate()
+                assert_perfect(maze)
+                # the events carve exactly the same doors
+                for chunk_size in [None, 7]:
+                    assert replay_events(generator_class, columns, rows, seed, chunk_size) == doors(maze)
+
+
+def test_same_seed_same_maze():
+    for generator_class in all_generators:
+        for seed in [0, 12345, 1 << 62]:
+            maze = generator_class(33, 21, seed).generate()
+            assert maze.seed == seed and maze.generator == generator_class.__name__
+            assert generator_class(33, 21, seed).generate().grid == maze.grid
+            # the seed can also be a Random instance, seeded with the same seed
+            assert generator_class(33, 21, random.Random(seed)).generate().grid == maze.grid
+            # the random choices don't depend on how the generation is driven
+            assert replay_events(generator_class, 33, 21, seed, 50) == doors(maze)
+        assert generator_class(33, 21, 1).generate().grid != generator_class(33, 21, 2).generate().grid
+
+
+def test_seeds_are_independent_of_the_global_random_generator():
+    random.seed(1)
+    mazes = [generator_class(20, 20, 7).generate().grid for generator_class in all_generators]
+    random.seed(2)
+    random.random()
+    assert [generator_class(20, 20, 7).generate().grid for generator_class in all_generators] == mazes
+    # and generating doesn't disturb the global random generator either
+    random.seed(3)
+    expected = random.random()
+    random.seed(3)
+    for generator_class in all_generators:
+        generator_class(20, 20, 7).generate()
+    assert random.random() == expected
+
+
+def dead_ends(maze: Maze) -> int:
+    return sum(1 for cell in maze.grid if bin(cell & DOORS).count("1") == 1)
+
+
+def test_braid():
+    for generator_class in [DepthFirstGenerator, KruskalGenerator, SidewinderGenerator]:
+        generator = generator_class(40, 30, 5)
+        maze = generator.generate()
+        perfect = bytes(maze.grid)
+        before = dead_ends(maze)
+        assert generator.braid(0.0) == 0 and maze.grid == perfect
+        removed = generator.braid(0.5)
+        # every removed wall is a door more, and the doors that were there are all still open
+        assert sum(bin(cell & DOORS).count("1") for cell in maze.grid) == 2 * (len(perfect) - 1 + removed)
+        assert all(cell & old == old for cell, old in zip(maze.grid, perfect))
+        assert 0 < dead_ends(maze) < before
+        # with a fraction of 1, all dead ends are gone: every cell is on a loop
+        generator.braid(1.0)
+        assert dead_ends(maze) == 0
+        # the doors are still consistent, it's only not a tree anymore
+        for index, cell in enumerate(maze.grid):
+            assert not (cell & E and not maze.grid[index + 1] & W)
+            assert not (cell & S and not maze.grid[index + 40] & N)
+        # the same seed braids the same walls
+        other = generator_class(40, 30, 5)
+        other.generate()
+        other.braid(0.0)
+        other.braid(0.5)
+        other.braid(1.0)
+        assert other.maze.grid == maze.grid
+
+
+def test_kruskal_and_wilson():
+    for generator_class in [KruskalGenerator, WilsonGenerator]:
+        for columns, rows in [(1, 1), (1, 9), (9, 1), (2, 2), (40, 25), (64, 3)]:
+            for seed in range(4):
+                maze = generator_class(columns, rows, seed).generate()
+                assert_perfect(maze)
+                for chunk_size in [None, 13]:
+                    assert replay_events(generator_class, columns, rows, seed, chunk_size) == doors(maze)
+        # the iterative generation ends with the same maze
+        *_, last = generator_class(40, 25, 3).generate_iterative()
+        assert last.grid == generator_class(40, 25, 3).generate().grid
+
+
+def test_kruskal_is_unbiased():
+    # the mazes are uniform spanning trees, so on average half of the doors of a square maze are horizontal
+    maze = KruskalGenerator(150, 150, 1).generate()
+    horizontal = sum(1 for cell in maze.grid if cell & E)
+    assert 0.47 < horizontal / (len(maze.grid) - 1) < 0.53
+    # that requires a uniform shuffle of the edges: then about half of the neighboring edges are in ascending order
+    edges = KruskalGenerator(150, 150, 1)._shuffled(range(45000))
+    assert sorted(edges) == list(range(45000))
+    ascending = sum(1 for a, b in zip(edges, edges[1:]) if a < b)
+    assert 0.49 < ascending / 45000 < 0.51
+
+
+def test_tiled():
+    for columns, rows, tile_size in [(37, 23, 10), (50, 50, 50), (64, 9, 8), (7, 30, 1)]:
+        maze = TiledGenerator(columns, rows, 4, tile_size=tile_size, workers=1).generate()
+        assert_perfect(maze)
+        assert maze.seed == 4 and maze.generator == "TiledGenerator"
+        # the maze doesn't depend on the number of workers, or on the order in which they finish their tiles
+        for workers in [2, 3]:
+            assert TiledGenerator(columns, rows, 4, tile_size=tile_size, workers=workers).generate().grid == maze.grid
+        *_, last = TiledGenerator(columns, rows, 4, tile_size=tile_size, workers=2).generate_iterative()
+        assert last.grid == maze.grid
+        events = Maze(columns, rows)
+        for chunk in TiledGenerator(columns, rows, 4, tile_size=tile_size, workers=2).generate_events(100):
+            for x, y, direction in chunk:
+                events.carve(x, y, direction)
+        assert doors(events) == doors(maze)
+    # tiles can be made by any generator
+    assert_perfect(TiledGenerator(40, 40, 1, tile_generator=WilsonGenerator, tile_size=16, workers=2).generate())
+
+
+def test_single_cell():
+    # a 1x1 maze has no doors, but its only cell is visited (so it's drawn as a room, not as solid wall)
+    for generator_class in all_generators:
+        assert generator_class(1, 1, 5).generate().grid == bytes([VISITED])
+        generator = generator_class(1, 1, 5)
+        assert list(generator.generate_events()) == [] and generator.maze.grid == bytes([VISITED])
@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from mazes.generators import DepthFirstGenerator, HuntAndKillGenerator, KruskalGenerator
+from mazes.index import MazeIndex
+from mazes.maze import Maze
+from mazes.solvers import BreadthFirstSolver
+
+
+def test_distance_and_path():
+    rng = random.Random(3)
+    for generator_class in [DepthFirstGenerator, HuntAndKillGenerator, KruskalGenerator]:
+        maze = generator_class(31, 17, seed=8).generate()
+        index = MazeIndex(maze)
+        cells = [(rng.randrange(31), rng.randrange(17)) for _ in range(40)] + [(0, 0), (30, 16)]
+        for a, b in zip(cells, reversed(cells)):
+            # the path in a perfect maze is unique, so it's exactly what the breadth-first search finds
+            path = BreadthFirstSolver().solve(maze, a, b)[0]
+            assert index.path(a, b) == path
+            assert index.distance(a, b) == len(path)
+        assert index.distance((5, 5), (5, 5)) == 0 and index.path((5, 5), (5, 5)) == ""
+
+
+def test_not_perfect():
+    generator = DepthFirstGenerator(20, 10, seed=1)
+    generator.generate()
+    generator.braid(1.0)
+    with pytest.raises(ValueError):
+        MazeIndex(generator.maze)
+    maze = DepthFirstGenerator(20, 10, seed=1).generate()
+    with pytest.raises(ValueError):
+        MazeIndex(maze).distance((20, 0), (0, 0))
+    # a maze without any doors yet
+    with pytest.raises(ValueError):
+        MazeIndex(Maze(3, 2))
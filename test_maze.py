@@ -0,0 +1,54 @@
+import pytest
+
+from mazes.generators import DepthFirstGenerator
+from mazes.maze import Maze, Cell, N, E, S, W, VISITED
+
+
+def test_cell_views():
+    maze = DepthFirstGenerator(12, 7, seed=2).generate()
+    for y in range(7):
+        for x in range(12):
+            cell = maze.cells[y][x]
+            assert cell.doors == maze.doors(x, y)
+            assert cell.open and cell.tag is None
+    assert len(maze.cells) == 7 and len(maze.cells[0]) == 12
+    assert [cell.doors for cell in maze.cells[-1]] == [maze.doors(x, 6) for x in range(12)]
+    assert [cell.doors for cell in maze.cells[2][3:5]] == [maze.doors(3, 2), maze.doors(4, 2)]
+    assert sum(1 for row in maze.cells for _ in row) == 84
+    with pytest.raises(IndexError):
+        maze.cells[7]
+    with pytest.raises(IndexError):
+        maze.cells[0][12]
+    # writing through the views changes the grid and the tags
+    cell = maze.cells[3][4]
+    cell.doors = "ns"
+    cell.open = False
+    cell.tag = 42
+    assert maze.grid[3 * 12 + 4] == N | S and maze.tags == {3 * 12 + 4: 42}
+    assert (maze.cells[3][4].doors, maze.cells[3][4].open, maze.cells[3][4].tag) == ("ns", False, 42)
+    cell.open = True
+    cell.tag = None
+    assert maze.grid[3 * 12 + 4] == N | S | VISITED and not maze.tags
+
+
+def test_from_cells():
+    cells = [[Cell() for _ in range(3)] for _ in range(2)]
+    cells[0][0].doors, cells[0][1].doors, cells[0][2].doors = "e", "ws", "s"
+    cells[1][0].doors, cells[1][1].doors, cells[1][2].doors = "e", "new", "nw"
+    for row in cells:
+        for cell in row:
+            cell.open = True
+    cells[1][2].tag = "goal"
+    maze = Maze.from_cells(cells)
+    assert (maze.num_columns, maze.num_rows) == (3, 2)
+    assert list(maze.grid) == [E | VISITED, W | S | VISITED, S | VISITED,
+                               E | VISITED, N | E | W | VISITED, N | W | VISITED]
+    assert maze.tags == {5: "goal"}
+    # the old way to make a maze from its cells still works as well
+    old = Maze(cells)
+    assert old.grid == maze.grid and old.tags == maze.tags
+    assert [[cell.doors for cell in row] for row in old.cells] == [["e", "sw", "s"], ["e", "new", "nw"]]
+    with pytest.raises(TypeError):
+        Maze(3)
+    with pytest.raises(ValueError):
+        Maze(3, 2, bytearray(5))
@@ -0,0 +1,70 @@
+from mazes.generators import DepthFirstGenerator, KruskalGenerator, WilsonGenerator, EllerGenerator
+from mazes.solvers import BreadthFirstSolver, DepthFirstSolver, AStarSolver, BidirectionalBFSSolver
+from mazes.distances import distance_field
+from mazes.replay import Replay, ReplayPlayer, record_generation, record_solve
+
+
+def test_generation_replay():
+    for generator_class in [DepthFirstGenerator, KruskalGenerator, WilsonGenerator, EllerGenerator]:
+        generator = generator_class(40, 25, seed=5)
+        replay = record_generation(generator, keyframe_interval=100)
+        player = ReplayPlayer(replay)
+        player.seek(len(replay))
+        assert player.maze.grid == generator.maze.grid
+        # going back and forth ends up in the same state as going straight to a frame
+        player.seek(600)
+        halfway = bytes(player.maze.grid)
+        player.seek(10)
+        player.step(590)
+        assert player.maze.grid == halfway
+        other = ReplayPlayer(replay)
+        other.seek(600)
+        assert other.maze.grid == halfway
+        player.seek(0)
+        assert not any(player.maze.grid)
+
+
+def test_generation_replay_is_compact():
+    replay = record_generation(DepthFirstGenerator(300, 300, seed=1))
+    assert len(replay) == 300 * 300 - 1
+    assert len(replay.data) < len(replay) * 1.3
+
+
+def test_solve_replay():
+    maze = DepthFirstGenerator(40, 25, seed=5).generate()
+    for solver_class in [BreadthFirstSolver, DepthFirstSolver, AStarSolver, BidirectionalBFSSolver]:
+        replay = record_solve(solver_class(), maze)
+        assert replay.solution == solver_class().solve(maze)[0]
+    # the paths of the player are the paths the solver followed
+    paths = list(DepthFirstSolver().solve_generator(maze))
+    player = ReplayPlayer(record_solve(DepthFirstSolver(), maze), maze)
+    for frame in [len(paths), 1, 100, 50, len(paths) // 2]:
+        player.seek(frame)
+        assert player.path() == paths[frame - 1]
+        # walking back from the current cell passes one cell per step of the path, down to the start
+        cells = [player.current]
+        while player.came_from(cells[-1]) >= 0:
+            cells.append(player.came_from(cells[-1]))
+        assert cells[-1] == 0 and len(cells) == len(paths[frame - 1]) + 1
+        assert [player.distances[index] for index in cells] == list(range(len(cells) - 1, -1, -1))
+    # the visited cells have their distance from the start, the same as in the distance field
+    field = distance_field(maze, [(0, 0)])
+    player = ReplayPlayer(record_solve(BreadthFirstSolver(), maze), maze)
+    player.seek(len(player.replay))
+    visited = [index for index, distance in enumerate(player.distances) if distance >= 0]
+    assert len(visited) == len(player.replay)
+    assert all(player.distances[index] == field[index] for index in visited)
+    assert not maze.tags
+
+
+def test_save_and_load(tmp_path):
+    maze = DepthFirstGenerator(30, 20, seed=3).generate()
+    replay = record_solve(AStarSolver(), maze, goal=(10, 10), keyframe_interval=50)
+    path = str(tmp_path / "solve.replay")
+    replay.save(path)
+    loaded = Replay.load(path)
+    assert (loaded.kind, loaded.columns, loaded.rows, loaded.seed, loaded.generator) == \
+           ("solve", 30, 20, 3, "DepthFirstGenerator")
+    assert (loaded.start, loaded.goal, loaded.solution) == (replay.start, replay.goal, replay.solution)
+    assert list(loaded.events()) == list(replay.events())
+    assert list(loaded.events(120, 130)) == list(replay.events())[120:130]
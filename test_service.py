@@ -0,0 +1,143 @@
+import asyncio
+import json
+
+import pytest
+
+from mazes.generators import DepthFirstGenerator, KruskalGenerator
+from mazes.maze import Maze
+from mazes.solvers import BreadthFirstSolver, AStarSolver, DijkstraSolver
+from mazes.service import MazeService, MazeClient, serve
+
+
+def test_loopback():
+    async def run():
+        async with MazeService(workers=2, queue_size=4) as service:
+            server = await serve(service, chunk_size=1000)
+            port = server.sockets[0].getsockname()[1]
+            async with MazeClient("127.0.0.1", port) as client:
+                maze = await client.generate("depthfirst", 60, 40, seed=7)
+                path, iterations = await client.solve(maze, "bfs")
+                with pytest.raises(ValueError):
+                    await client.generate("nonexisting", 10, 10)
+                # the connection is still usable after an error
+                solved_again = await client.solve(maze, "astar", goal=(10, 10))
+            server.close()
+            await server.wait_closed()
+        return maze, path, iterations, solved_again
+
+    maze, path, iterations, solved_again = asyncio.run(run())
+    assert maze.grid == DepthFirstGenerator(60, 40, seed=7).generate().grid
+    assert maze.seed == 7 and maze.generator == "DepthFirstGenerator"
+    assert (path, iterations) == BreadthFirstSolver().solve(maze)
+    assert solved_again == AStarSolver().solve(maze, goal=(10, 10))
+
+
+def test_coalescing_and_backpressure():
+    async def run():
+        async with MazeService(workers=1, queue_size=2) as service:
+            # identical requests share one computation
+            mazes = await asyncio.gather(*(service.generate("kruskal", 50, 50, seed=1) for _ in range(10)))
+            assert service.computations == 1
+            # different requests queue up, but never more than the queue size
+            requests = [asyncio.ensure_future(service.generate("kruskal", 50, 50, seed=seed)) for seed in range(8)]
+            largest_queue = 0
+            while not all(request.done() for request in requests):
+                largest_queue = max(largest_queue, service.queued)
+                await asyncio.sleep(0.001)
+            assert 0 < largest_queue <= 2
+            assert service.computations == 9
+            return mazes, [request.result() for request in requests]
+
+    mazes, different = asyncio.run(run())
+    assert all(maze.grid == KruskalGenerator(50, 50, seed=1).generate().grid for maze in mazes)
+    assert len({bytes(maze.grid) for maze in different}) == 8
+
+
+def test_bad_requests():
+    async def request(writer, reader, line, data=b""):
+        writer.write(line + b"\n" + data)
+        await writer.drain()
+        return json.loads(await reader.readline() or b"null")
+
+    async def run():
+        async with MazeService(workers=1) as service:
+            server = await serve(service)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            # the grid of a bad solve request is still read, so the next request is understood
+            response = await request(writer, reader, b'{"command": "solve", "solver": "nonexisting", '
+                                                     b'"columns": 4, "rows": 3}', b"\n" * 12)
+            assert "error" in response
+            response = await request(writer, reader, b'{"command": "generate", "columns": 4, "rows": 3, "seed": 1}')
+            assert response["length"] == 12
+            await reader.readexactly(12)
+            # without a size, the grid that follows can't be skipped: the connection is closed after the error
+            response = await request(writer, reader, b'{"command": "solve", "columns": 4}', b"\n" * 12)
+            assert "error" in response
+            assert await reader.read() == b""
+            writer.close()
+            async with MazeClient("127.0.0.1", port) as client:
+                # errors raised in the worker processes are reported to the client too
+                maze = await client.generate("depthfirst", 10, 10, seed=1)
+                with pytest.raises(ValueError, match="inside the maze"):
+                    await client.solve(maze, "bfs", start=(10, 10))
+                assert await client.solve(maze, "bfs") == BreadthFirstSolver().solve(maze)
+                # and so are requests after the service has been closed
+                await service.close()
+                with pytest.raises(ValueError, match="isn't started"):
+                    await client.generate("depthfirst", 10, 10, seed=1)
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_size_limit():
+    async def run():
+        async with MazeService(workers=1) as service:
+            server = await serve(service, max_cells=100)
+            port = server.sockets[0].getsockname()[1]
+            async with MazeClient("127.0.0.1", port) as client:
+                with pytest.raises(ValueError, match="at most 100 cells"):
+                    await client.generate("depthfirst", 20, 10)
+                # a generate request that's refused leaves the connection usable
+                maze = await client.generate("depthfirst", 10, 10, seed=3)
+                assert await client.solve(maze, "bfs") == BreadthFirstSolver().solve(maze)
+            # the grid of a solve request that's too large isn't read: the connection is closed after the error
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b'{"command": "solve", "columns": 1000000, "rows": 1000000}\n')
+            await writer.drain()
+            assert "at most 100 cells" in json.loads(await reader.readline())["error"]
+            assert await reader.read() == b""
+            writer.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_weighted_mazes():
+    generator = DepthFirstGenerator(30, 20, seed=2)
+    maze = generator.generate()
+    generator.braid(0.7)
+    generator.generate_costs(1, 9, 4)
+    unweighted = Maze(30, 20, bytearray(maze.grid))
+
+    async def run():
+        async with MazeService(workers=1) as service:
+            solved = await service.solve(maze, "dijkstra")
+            # the costs are part of the key, so this isn't coalesced with (or cached as) the weighted maze
+            assert await service.solve(unweighted, "dijkstra") == DijkstraSolver().solve(unweighted)
+            server = await serve(service)
+            port = server.sockets[0].getsockname()[1]
+            async with MazeClient("127.0.0.1", port) as client:
+                remote = await client.solve(maze, "dijkstra", goal=(5, 19))
+                # the connection is in sync after the costs
+                assert await client.solve(unweighted, "dijkstra") == DijkstraSolver().solve(unweighted)
+            server.close()
+            await server.wait_closed()
+        return solved, remote
+
+    solved, remote = asyncio.run(run())
+    assert solved == DijkstraSolver().solve(maze)
+    assert remote == DijkstraSolver().solve(maze, goal=(5, 19))
@@ -5,7 +5,7 @@ from mazes.solvers import *
 
 maze = DepthFirstGenerator(20, 10).generate()
 
-for solver_class in [BreadthFirstSolver, DepthFirstSolver]:
+for solver_class in [BreadthFirstSolver, DepthFirstSolver, AStarSolver, BidirectionalBFSSolver, DijkstraSolver]:
     print("solving using", solver_class.__name__)
     solver = solver_class()
     start = time.time()
@@ -0,0 +1,143 @@
+import pytest
+
+from mazes.distances import distance_field
+from mazes.generators import DepthFirstGenerator, BinaryTreeGenerator
+from mazes.maze import dxdy, direction_bits, E, S
+from mazes.solvers import MazeSolver, BreadthFirstSolver, DepthFirstSolver, AStarSolver, BidirectionalBFSSolver, DijkstraSolver
+
+
+def test_depth_first_solve_generator_outputs():
+    for maze in [DepthFirstGenerator(50, 30, seed=2).generate(), BinaryTreeGenerator(50, 30, seed=2).generate()]:
+        for goal in [None, (7, 5)]:
+            paths = list(DepthFirstSolver().solve_generator(maze, goal=goal))
+            assert paths[0] == ""
+            assert paths[-1] == DepthFirstSolver().solve(maze, goal=goal)[0]
+            # the same path, shared and changed in place
+            shared = [bytes(path) for path in DepthFirstSolver().solve_generator(maze, goal=goal, output="shared")]
+            assert [path.decode() for path in shared] == paths
+            # the path, rebuilt from the events
+            path = []
+            for (steps, direction), expected in zip(
+                    DepthFirstSolver().solve_generator(maze, goal=goal, output="events"), paths):
+                del path[len(path) - steps:]
+                path.extend(direction)
+                assert "".join(path) == expected
+    with pytest.raises(ValueError):
+        next(DepthFirstSolver().solve_generator(maze, output="strings"))
+
+
+def test_visit_generator():
+    generator = DepthFirstGenerator(40, 25, seed=3)
+    maze = generator.generate()
+    generator.braid(0.5)
+    for solver_class in [BreadthFirstSolver, DepthFirstSolver, AStarSolver, BidirectionalBFSSolver, DijkstraSolver]:
+        for goal in [None, (12, 9)]:
+            visits = []
+            search = solver_class().visit_generator(maze, goal=goal)
+            try:
+                while True:
+                    visits.append(next(search))
+            except StopIteration as result:
+                solution = result.value
+            assert solution == solver_class().solve(maze, goal=goal)[0]
+            cells = [index for index, _ in visits]
+            assert len(cells) == len(set(cells))
+            goal_x, goal_y = goal or (39, 24)
+            assert goal_y * 40 + goal_x in cells
+            # every cell is entered from a cell that was visited before it (or is where a search started)
+            offsets = {"n": -40, "e": 1, "s": 40, "w": -1}
+            seen = set()
+            for index, direction in visits:
+                assert not direction or index - offsets[direction] in seen
+                seen.add(index)
+
+
+class PathsOnlySolver(BreadthFirstSolver):
+    # a solver that only has solve() and solve_generator(), and gets the default visit_generator()
+    visit_generator = MazeSolver.visit_generator
+
+
+def test_default_visit_generator():
+    maze = DepthFirstGenerator(30, 20, seed=4).generate()
+    for goal in [None, (0, 0), (17, 3)]:
+        assert list(PathsOnlySolver().visit_generator(maze, goal=goal)) == \
+            list(BreadthFirstSolver().visit_generator(maze, goal=goal))
+        search = PathsOnlySolver().visit_generator(maze, goal=goal)
+        with pytest.raises(StopIteration) as result:
+            while True:
+                next(search)
+        assert result.value.value == BreadthFirstSolver().solve(maze, goal=goal)[0]
+    # without a path to the goal, it returns None
+    maze.grid[-1] = 0
+    maze.grid[-2] &= ~E
+    maze.grid[-31] &= ~S
+    search = PathsOnlySolver().visit_generator(maze)
+    with pytest.raises(StopIteration) as result:
+        while True:
+            next(search)
+    assert result.value.value is None
+
+
+def follow(maze, path, start=(0, 0)):
+    # the cell where the path ends up, taking only steps through open doors
+    x, y = start
+    for step in path:
+        assert maze.grid[y * maze.num_columns + x] & direction_bits[step]
+        x, y = x + dxdy[step][0], y + dxdy[step][1]
+    return x, y
+
+
+def test_braided_mazes():
+    generator = DepthFirstGenerator(50, 40, seed=9)
+    maze = generator.generate()
+    generator.braid(1.0)
+    for start, goal in [((0, 0), (49, 39)), ((20, 30), (3, 4))]:
+        shortest = distance_field(maze, [start])[goal[1] * 50 + goal[0]]
+        for solver_class in [BreadthFirstSolver, AStarSolver, BidirectionalBFSSolver, DijkstraSolver]:
+            path = solver_class().solve(maze, start, goal)[0]
+            assert len(path) == shortest
+            assert follow(maze, path, start) == goal
+        # the depth-first search finds a path, but not necessarily the shortest one
+        path = DepthFirstSolver().solve(maze, start, goal)[0]
+        assert len(path) >= shortest
+        assert follow(maze, path, start) == goal
+
+
+def cheapest_costs(maze, start):
+    # brute force: keep relaxing the cost of every cell through all of its doors until nothing improves anymore
+    columns = maze.num_columns
+    costs = [None] * len(maze.grid)
+    costs[start[1] * columns + start[0]] = 0
+    changed = True
+    while changed:
+        changed = False
+        for index, cell in enumerate(maze.grid):
+            for direction, (dx, dy) in dxdy.items():
+                if cell & direction_bits[direction] and costs[index] is not None:
+                    neighbor = index + dy * columns + dx
+                    cost = costs[index] + maze.costs[neighbor]
+                    if costs[neighbor] is None or cost < costs[neighbor]:
+                        costs[neighbor] = cost
+                        changed = True
+    return costs
+
+
+def test_dijkstra_on_weighted_mazes():
+    for seed in range(4):
+        generator = DepthFirstGenerator(16, 11, seed=seed)
+        maze = generator.generate()
+        generator.braid(0.7)
+        generator.generate_costs(1, 9, 4)
+        assert min(maze.costs) >= 1 and max(maze.costs) <= 9
+        for start, goal in [((0, 0), (15, 10)), ((7, 5), (0, 10))]:
+            costs = cheapest_costs(maze, start)
+            path = DijkstraSolver().solve(maze, start, goal)[0]
+            assert follow(maze, path, start) == goal
+            assert maze.path_cost(path, start) == costs[goal[1] * 16 + goal[0]]
+            # the shortest path isn't necessarily the cheapest one
+            shortest = BreadthFirstSolver().solve(maze, start, goal)[0]
+            assert len(shortest) <= len(path) and maze.path_cost(shortest, start) >= maze.path_cost(path, start)
+    # without costs every step costs 1, like in the breadth-first search
+    maze = DepthFirstGenerator(16, 11, seed=1).generate()
+    path = DijkstraSolver().solve(maze)[0]
+    assert path == BreadthFirstSolver().solve(maze)[0] and maze.path_cost(path) == len(path)
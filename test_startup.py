@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+from typing import Dict
+
+# The command line interface (python -m mazes) is run many times from scripts, so it has to start quickly.
+# python -X importtime reports how long every import took: the total is kept within a budget,
+# and every command may only import the modules it actually needs.
+
+IMPORT_BUDGET = 0.05    # seconds for all imports of a command (the bare interpreter's own imports take ~6 ms)
+
+
+def import_times(*args: str) -> Dict[str, float]:
+    # runs python -m mazes with the arguments, and returns module name -> seconds spent importing just that module
+    environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.run([sys.executable, "-X", "importtime", "-m", "mazes"] + list(args),
+                             env=environment, capture_output=True, text=True, check=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if line.startswith("import time:") and "self [us]" not in line:
+            microseconds, _, name = line[len("import time:"):].split("|")
+            times[name.strip()] = int(microseconds) / 1e6
+    return times
+
+
+def test_generate_imports():
+    modules = import_times("generate", "10", "10", "--seed", "1")
+    assert "mazes.generators" in modules
+    for module in ["mazes.solvers", "mazes.tiled", "mazes.storage", "mazes.batch", "mazes.stats",
+                   "concurrent.futures", "multiprocessing", "json"]:
+        assert module not in modules
+
+
+def test_solve_imports(tmp_path):
+    path = str(tmp_path / "maze.bin")
+    import_times("generate", "10", "10", "--seed", "1", "--output", path)
+    modules = import_times("solve", path, "--solver", "astar")
+    assert "mazes.solvers" in modules and "mazes.storage" in modules
+    for module in ["mazes.generators", "mazes.tiled", "mazes.text", "concurrent.futures", "json"]:
+        assert module not in modules
+
+
+def test_startup_budget():
+    # the best of a few runs, to not be thrown off by a busy machine
+    total = min(sum(import_times("generate", "10", "10", "--seed", "1").values()) for _ in range(3))
+    assert total < IMPORT_BUDGET, "imports took {:.1f} ms".format(total * 1000)
@@ -0,0 +1,60 @@
+from mazes.generators import DepthFirstGenerator, EllerGenerator
+from mazes.maze import Maze
+from mazes.stats import maze_stats, generator_stats, summarize
+
+
+def hand_built_maze() -> Maze:
+    #   +--+--+--+
+    #   |        |      (0,0) (2,0) (2,1) (0,2) (2,2) are dead ends,
+    #   +--+  +--+      (0,1) and (1,2) are corridors,
+    #   |        |      (1,0) is a three way junction and (1,1) a four way one
+    #   +  +  +--+
+    #   |  |     |
+    #   +--+--+--+
+    maze = Maze(3, 3)
+    for x, y, direction in [(0, 0, "e"), (1, 0, "e"), (1, 0, "s"), (0, 1, "e"),
+                            (1, 1, "e"), (1, 1, "s"), (1, 2, "e"), (0, 1, "s")]:
+        maze.carve(x, y, direction)
+    return maze
+
+
+def test_hand_built_maze():
+    stats = maze_stats(hand_built_maze())
+    assert (stats.cells, stats.dead_ends, stats.corridors, stats.junctions) == (9, 5, 2, 2)
+    assert stats.dead_end_ratio == 5 / 9
+    # 5 dead ends + 3 + 4 junction doors are the ends of 6 passages
+    assert stats.river == 9 / 6
+    assert (stats.horizontal_doors, stats.vertical_doors) == (5, 3)
+    assert stats.solution_length == 4 and stats.longest_path == 4
+    assert stats.solution_directions == {"n": 0, "e": 2, "s": 2, "w": 0}
+    other = maze_stats(hand_built_maze(), start=(0, 2), goal=(2, 0))
+    assert other.solution_length == 4
+    assert other.solution_directions == {"n": 2, "e": 2, "s": 0, "w": 0}
+
+
+def test_unreachable_goal():
+    maze = Maze(4, 3)
+    maze.carve(0, 0, "e")
+    stats = maze_stats(maze)
+    assert stats.solution_length == -1 and stats.longest_path == 1
+    assert (stats.dead_ends, stats.corridors, stats.junctions) == (2, 0, 0)
+    assert stats.solution_directions == dict.fromkeys("nesw", 0)
+
+
+def test_perfect_mazes():
+    for generator_class in [DepthFirstGenerator, EllerGenerator]:
+        stats = maze_stats(generator_class(40, 30, seed=2).generate())
+        assert stats.dead_ends + stats.corridors + stats.junctions == stats.cells == 1200
+        assert stats.horizontal_doors + stats.vertical_doors == stats.cells - 1
+        assert stats.solution_length == sum(stats.solution_directions.values())
+        assert stats.solution_length <= stats.longest_path
+
+
+def test_generator_stats():
+    seeds = [1, 2, 3]
+    serial = [maze_stats(EllerGenerator(20, 15, seed).generate()) for seed in seeds]
+    assert generator_stats(EllerGenerator, 20, 15, seeds, workers=2) == serial
+    summary = summarize(serial)
+    assert summary["dead_ends"] == (sum(s.dead_ends for s in serial) / 3,
+                                    min(s.dead_ends for s in serial), max(s.dead_ends for s in serial))
+    assert abs(sum(summary["solution_" + direction][0] for direction in "nesw") - 1) < 1e-9
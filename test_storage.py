@@ -0,0 +1,66 @@
+import pytest
+
+from mazes.generators import DepthFirstGenerator, KruskalGenerator
+from mazes.maze import DOORS
+from mazes.storage import save_maze, load_maze, PackedGrid
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "maze.bin")
+    # an odd number of cells, so the last byte of the packed cells only has one cell in it
+    maze = KruskalGenerator(37, 21, seed=11).generate()
+    for compression in [None, "zlib", "lzma"]:
+        save_maze(maze, path, compression)
+        loaded = load_maze(path)
+        assert loaded.grid == maze.grid
+        assert (loaded.num_columns, loaded.num_rows, loaded.seed, loaded.generator) == (37, 21, 11, "KruskalGenerator")
+    # compressed files are always loaded into memory, mapped or not
+    assert isinstance(load_maze(path, mapped=True).grid, bytearray)
+
+
+def test_mapped(tmp_path):
+    path = str(tmp_path / "maze.bin")
+    maze = DepthFirstGenerator(37, 21, seed=11).generate()
+    maze.seed = maze.generator = None
+    save_maze(maze, path)
+    loaded = load_maze(path, mapped=True)
+    assert isinstance(loaded.grid, PackedGrid)
+    assert loaded.seed is None and loaded.generator is None
+    assert bytes(loaded.grid) == bytes(maze.grid)
+    assert [loaded.grid[index] for index in (0, 1, 500, -1)] == [maze.grid[index] for index in (0, 1, 500, -1)]
+    assert loaded.grid[101:360] == bytes(maze.grid[101:360])
+    assert loaded.grid[8:8] == b""
+    assert loaded.doors(36, 20) == maze.doors(36, 20)
+    with pytest.raises(IndexError):
+        loaded.grid[37 * 21]
+
+
+def test_visited_bits_are_not_stored(tmp_path):
+    path = str(tmp_path / "maze.bin")
+    maze = DepthFirstGenerator(4, 3, seed=1).generate()
+    maze.grid[5] &= DOORS
+    save_maze(maze, path)
+    assert load_maze(path).grid == DepthFirstGenerator(4, 3, seed=1).generate().grid
+
+
+def test_errors(tmp_path):
+    path = str(tmp_path / "maze.bin")
+    maze = DepthFirstGenerator(4, 3, seed=1).generate()
+    with pytest.raises(ValueError):
+        save_maze(maze, path, "zip")
+    maze.seed = 1 << 63
+    with pytest.raises(ValueError):
+        save_maze(maze, path)
+    maze.seed = -1 << 63
+    save_maze(maze, path)
+    assert load_maze(path).seed == -1 << 63
+    with open(path, "r+b") as file:
+        file.truncate(30)
+    with pytest.raises(ValueError):
+        load_maze(path)
+    with pytest.raises(ValueError):
+        load_maze(path, mapped=True)
+    with open(path, "wb") as file:
+        file.write(b"not a maze at all")
+    with pytest.raises(ValueError):
+        load_maze(path)
@@ -1,19 +1,22 @@
 import time
+from typing import Optional, Sequence
 
 from mazes.generators import *
-from mazes.maze import Maze
+from mazes.maze import Maze, N, E, VISITED
+from mazes.replay import ReplayPlayer, record_generation, record_solve
 from mazes.solvers import DepthFirstSolver, BreadthFirstSolver, dxdy
 
 
 def ascii_maze_with_path(maze: Maze, path: str = "", wall: str = '#', space: str = ' ', walk: str = '*') -> str:
     result = [[wall for _ in range(maze.num_columns * 2 + 1)] for _ in range(maze.num_rows * 2 + 1)]
-    for rowidx, row in enumerate(maze.cells):
-        for colidx, cell in enumerate(row):
-            if cell.open:
+    for rowidx in range(maze.num_rows):
+        offset = rowidx * maze.num_columns
+        for colidx, cell in enumerate(maze.grid[offset:offset + maze.num_columns]):
+            if cell & VISITED:
                 result[1 + rowidx * 2][1 + colidx * 2] = space
-            if 'n' in cell.doors:
+            if cell & N:
                 result[rowidx * 2][1 + colidx * 2] = space
-            if 'e' in cell.doors:
+            if cell & E:
                 result[1 + rowidx * 2][2 + colidx * 2] = space
             # the south and west don't have to be drawn because the neighbor cells already takes care of these
     if path:
@@ -29,16 +32,22 @@ def ascii_maze_with_path(maze: Maze, path: str = "", wall: str = '#', space: str
     return "\n".join("".join(line) for line in result)
 
 
-def ascii_maze_with_tags(maze: Maze, wall: str = '#', space: str = ' ', tagged: str = '*') -> str:
+def ascii_maze_with_tags(maze: Maze, wall: str = '#', space: str = ' ', tagged: str = '*',
+                         distances: Optional[Sequence[int]] = None) -> str:
+    # with distances (a distance field), the cells with a distance are marked instead of the tagged cells
     result = [[wall for _ in range(maze.num_columns * 2 + 1)] for _ in range(maze.num_rows * 2 + 1)]
-    for rowidx, row in enumerate(maze.cells):
-        for colidx, cell in enumerate(row):
-            char = tagged if cell.tag else space
-            if cell.open:
+    for rowidx in range(maze.num_rows):
+        offset = rowidx * maze.num_columns
+        for colidx, cell in enumerate(maze.grid[offset:offset + maze.num_columns]):
+            if distances is None:
+                char = tagged if maze.tags.get(offset + colidx) else space
+            else:
+                char = tagged if distances[offset + colidx] >= 0 else space
+            if cell & VISITED:
                 result[1 + rowidx * 2][1 + colidx * 2] = char
-            if 'n' in cell.doors:
+            if cell & N:
                 result[rowidx * 2][1 + colidx * 2] = char
-            if 'e' in cell.doors:
+            if cell & E:
                 result[1 + rowidx * 2][2 + colidx * 2] = char
             # the south and west don't have to be drawn because the neighbor cells already takes care of these
     return "\n".join("".join(line) for line in result)
@@ -51,48 +60,41 @@ if __name__ == "__main__":
     # print(ascii_maze(maze, "", wall='▒', space='·'))
 
     # maze_generator = HuntAndKillGenerator(30, 12)
+    # maze_generator = WilsonGenerator(35, 14)
+    # the generation and the searches are recorded as replays first, and then played back
     maze_generator = DepthFirstGenerator(35, 14)
-    maze = Maze([[]])
-    if maze_generator.suggested_iteration_size == 1:
-        for maze in maze_generator.generate_iterative():
-            print("\033[2J\033[H")  # clear screen
-            print(ascii_maze_with_path(maze, "", wall='▒', space='·'))
-            print()
-            time.sleep(0.05)
-    else:
-        mazes = iter(maze_generator.generate_iterative())
-        while True:
-            try:
-                for _ in range(maze_generator.suggested_iteration_size):
-                    maze = next(mazes)
-                print("\033[2J\033[H")  # clear screen
-                print(ascii_maze_with_path(maze, "", wall='▒', space='·'))
-                print()
-                time.sleep(0.05)
-            except StopIteration:
-                break
+    player = ReplayPlayer(record_generation(maze_generator))
+    maze = maze_generator.maze
+    while player.frame < len(player.replay):
+        player.step(maze_generator.suggested_iteration_size)
+        print("\033[2J\033[H")  # clear screen
+        print(ascii_maze_with_path(player.maze, "", wall='▒', space='·'))
+        print()
+        time.sleep(0.05)
 
     # solve maze using BFS and animate the searched paths
-    bfs_solver = BreadthFirstSolver()
-    path = ""
-    for path in bfs_solver.solve_generator(maze):
+    replay = record_solve(BreadthFirstSolver(), maze)
+    player = ReplayPlayer(replay, maze)
+    while player.frame < len(replay):
+        player.step()
         print("\033[2J\033[H")  # clear screen
-        print(ascii_maze_with_tags(maze, wall='▒', space='·'))
+        print(ascii_maze_with_tags(maze, wall='▒', space='·', distances=player.distances))
         print()
         time.sleep(0.02)
 
-    print("BFS final solution:\n  ", path or "<no solution found>")
+    print("BFS final solution:\n  ", replay.solution or "<no solution found>")
 
     # solve maze using DFS and animate the searched paths
-    # dfs_solver = DepthFirstSolver()
-    # path = ""
-    # for path in dfs_solver.solve_generator(maze):
+    # replay = record_solve(DepthFirstSolver(), maze)
+    # player = ReplayPlayer(replay, maze)
+    # while player.frame < len(replay):
+    #     player.step()
     #     print("\033[2J\033[H")      # clear screen
-    #     print(ascii_maze_with_path(maze, path, wall='▒', space='·'))
+    #     print(ascii_maze_with_path(maze, player.path(), wall='▒', space='·'))
     #     print()
     #     time.sleep(0.02)
     #
-    # print("DFS final solution:\n  ", path or "<no solution found>")
+    # print("DFS final solution:\n  ", replay.solution or "<no solution found>")
 
     # solve maze in one go using Depth First Search:
     dfs_solver = DepthFirstSolver()